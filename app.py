@@ -1,5 +1,7 @@
 import os
+import json
 import logging
+import click
 
 from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
 from flask_sqlalchemy import SQLAlchemy
@@ -32,11 +34,17 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 # Initialize SQLAlchemy with app
 db.init_app(app)
 
-# Import models and create tables
+# Import models and bring the schema up to date
 with app.app_context():
     from models import Signal
-    from tracker import WinrateTracker
-    db.create_all()
+    from registry import get_tracker
+    from jobs import job_queue, JobQueueFull, check_job_params
+    from migrations import migrate
+    from archive import signal_history
+    migrate()
+
+# Seconds a /backtest form submission waits for its job before showing progress instead
+BACKTEST_INLINE_WAIT = float(os.environ.get("BACKTEST_INLINE_WAIT", 5))
 
 # Routes
 @app.route('/alive')
@@ -46,18 +54,13 @@ def alive():
 
 @app.route('/')
 def index():
-    tracker = WinrateTracker()
+    tracker = get_tracker()
     global_stats = tracker.calculate_winrate(days=30)
     recent_signals = Signal.query.order_by(Signal.timestamp.desc()).limit(5).all()
-    pair_performance = tracker.pair_performance()
     
     # Get top 3 performing pairs with at least 5 trades
-    top_pairs = []
-    for pair, data in pair_performance.items():
-        if data['trades'] >= 5:
-            top_pairs.append({'pair': pair, 'winrate': data['winrate'] * 100, 'trades': data['trades']})
-    
-    top_pairs = sorted(top_pairs, key=lambda x: x['winrate'], reverse=True)[:3]
+    top_pairs = [{'pair': pair, 'winrate': data['winrate'] * 100, 'trades': data['trades']}
+                 for pair, data in tracker.pair_performance(min_trades=5, sort_by='winrate', limit=3).items()]
     
     return render_template('index.html', 
                           global_stats=global_stats, 
@@ -68,13 +71,17 @@ def index():
 def signals():
     page = request.args.get('page', 1, type=int)
     per_page = 20
-    signals = Signal.query.order_by(Signal.timestamp.desc()).paginate(page=page, per_page=per_page)
-    return render_template('signals.html', signals=signals)
+    # Recent and open signals by default; ?archived=1 pages through the archive too
+    archived = request.args.get('archived', 0, type=int)
+    history = signal_history() if archived else Signal
+    signals = db.paginate(db.select(history).order_by(history.timestamp.desc()), page=page, per_page=per_page)
+    return render_template('signals.html', signals=signals, archived=archived)
 
 @app.route('/pairs')
 def pairs():
-    tracker = WinrateTracker()
-    pair_stats = tracker.pair_performance()
+    tracker = get_tracker()
+    # Sorted by trade count in the query
+    pair_stats = tracker.pair_performance(sort_by='trades')
     
     # Convert to list for template
     pair_list = []
@@ -85,28 +92,114 @@ def pairs():
             'winrate': data['winrate'] * 100
         })
     
-    # Sort by trade count
-    pair_list = sorted(pair_list, key=lambda x: x['trades'], reverse=True)
-    
     return render_template('pairs.html', pairs=pair_list)
 
 @app.route('/backtest', methods=['GET', 'POST'])
 def backtest():
     result = None
+    job = None
     
     if request.method == 'POST':
-        pair = request.form.get('pair')
-        days = int(request.form.get('days', 90))
-        timeframe = request.form.get('timeframe', '4h')
+        try:
+            params = check_job_params('backtest', {
+                'pair': request.form.get('pair', ''),
+                'days': request.form.get('days', 90),
+                'timeframe': request.form.get('timeframe', '4h'),
+                'resolve_ambiguous': request.form.get('resolve_ambiguous') == 'on'
+            })
+        except ValueError as e:
+            flash(str(e), "danger")
+            return render_template('backtest.html', result=None, job=None)
         
-        tracker = WinrateTracker()
         try:
-            result = tracker.backtest_strategy(pair, timeframe, days)
+            # Run on the job queue; short backtests still render in the same response
+            job_id = job_queue.submit('backtest', params)
+            job = job_queue.wait(job_id, timeout=BACKTEST_INLINE_WAIT)
+        except JobQueueFull as e:
+            flash("Too many backtests are running, please try again shortly", "warning")
+            logger.warning(f"Backtest rejected: {str(e)}")
         except Exception as e:
             flash(f"Backtest error: {str(e)}", "danger")
             logger.error(f"Backtest error: {str(e)}")
+    elif request.args.get('job'):
+        job = job_queue.get(request.args['job'])
+        if job is None:
+            flash("Backtest job not found or expired", "warning")
+    
+    if job and job['status'] == 'done':
+        result = job['result']
+        job = None
+    elif job and job['status'] == 'failed':
+        flash(f"Backtest error: {job['error']}", "danger")
+        job = None
+    
+    return render_template('backtest.html', result=result, job=job)
+
+@app.route('/api/backtest/jobs', methods=['POST'])
+def submit_backtest_job():
+    """
+    API endpoint to queue a backtest job
+    
+    Parameters are checked with jobs.check_job_params (400 on anything it rejects).
+    Jobs live in the memory of the worker process that accepted them, so the
+    returned status_url only resolves on that process; behind several gunicorn
+    workers, route polling back to the same worker (or run one worker).
+    """
+    params = dict(request.get_json(silent=True) or request.form)
+    kind = params.pop('kind', 'backtest')
+    
+    try:
+        params = check_job_params(kind, params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        job_id = job_queue.submit(kind, params)
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 429
+    
+    return jsonify({'job_id': job_id, 'status_url': url_for('get_backtest_job', job_id=job_id)}), 202
+
+@app.route('/api/backtest/jobs/<job_id>', methods=['GET'])
+def get_backtest_job(job_id):
+    """API endpoint to poll a backtest job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify(job)
+
+@app.route('/api/backtest/batch', methods=['POST'])
+def backtest_batch():
+    """API endpoint to queue a backtest of several pairs and timeframes at once"""
+    params = dict(request.get_json(silent=True) or request.form)
+    params.setdefault('timeframes', '4h')
+    params.setdefault('days', 90)
     
-    return render_template('backtest.html', result=result)
+    try:
+        params = check_job_params('batch', params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    params['pairs'] = params.get('pairs') or None
+    
+    try:
+        job_id = job_queue.submit('batch', params)
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 429
+    
+    return jsonify({'job_id': job_id, 'status_url': url_for('get_backtest_job', job_id=job_id)}), 202
+
+@app.route('/api/backtest/cache', methods=['GET'])
+def backtest_cache_stats():
+    """API endpoint to get backtest result cache counters"""
+    tracker = get_tracker()
+    return jsonify(tracker.backtest_cache.stats())
+
+@app.route('/api/stats/cache', methods=['GET'])
+def stats_cache_stats():
+    """API endpoint to get winrate/pair statistics cache counters"""
+    tracker = get_tracker()
+    return jsonify(tracker.stats_cache.stats())
 
 @app.route('/api/signals', methods=['GET'])
 def get_signals():
@@ -135,18 +228,80 @@ def get_signals():
 def get_winrate():
     """API endpoint to get winrate statistics for charts"""
     days = request.args.get('days', 30, type=int)
-    tracker = WinrateTracker()
+    tracker = get_tracker()
     stats = tracker.calculate_winrate(days=days)
     
     return jsonify(stats)
 
 @app.route('/api/pairs', methods=['GET'])
 def get_pairs():
-    """API endpoint to get pair performance statistics"""
-    tracker = WinrateTracker()
-    pairs = tracker.pair_performance()
+    """API endpoint to get pair performance statistics (?min_trades=&sort_by=&limit=&days=)"""
+    sort_by = request.args.get('sort_by')
+    if sort_by not in (None, 'winrate', 'trades', 'wins', 'pair'):
+        return jsonify({'error': f'Unknown sort_by: {sort_by}'}), 400
+    
+    tracker = get_tracker()
+    pairs = tracker.pair_performance(
+        min_trades=request.args.get('min_trades', 0, type=int),
+        sort_by=sort_by,
+        limit=request.args.get('limit', type=int),
+        days=request.args.get('days', type=int)
+    )
+    
+    # Keep the query's order (jsonify would sort the pair keys)
+    return app.response_class(json.dumps(pairs), mimetype='application/json')
+
+@app.route('/api/prices', methods=['GET'])
+def get_prices():
+    """
+    API endpoint to get current prices in one bulk request
     
-    return jsonify(pairs)
+    With ?symbols=BTCUSDT,ETHUSDT returns those prices; without it prices every
+    open signal.
+    """
+    tracker = get_tracker()
+    symbols = request.args.get('symbols')
+    
+    if not symbols:
+        return jsonify({'positions': tracker.open_positions()})
+    
+    prices = tracker.binance_api.get_current_prices([s.strip().upper() for s in symbols.split(',') if s.strip()])
+    if prices is None:
+        return jsonify({'error': 'Could not get prices'}), 502
+    
+    prices = prices.astype(object)
+    return jsonify(prices.where(prices.notna(), None).to_dict(orient='index'))
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the per-day signal rollups from the signals table"""
+    from rollups import rebuild_rollups
+    print(f"Rebuilt {rebuild_rollups()} rollup rows")
+
+@app.cli.command('archive-signals')
+@click.option('--days', type=int, default=None, help='Archive closed signals older than this (default SIGNAL_ARCHIVE_DAYS)')
+def archive_signals_command(days):
+    """Move old closed signals from the signals table into the monthly archive"""
+    from archive import archive_signals, archive_stats
+    print(f"Archived {archive_signals(days=days)} signals; {archive_stats()}")
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations and print the schema version"""
+    from migrations import migrate, schema_version
+    applied = migrate()
+    print(f"Applied migrations: {', '.join(map(str, applied)) or 'none'}; schema version {schema_version()}")
+
+@app.cli.command('check-plans')
+def check_plans_command():
+    """EXPLAIN the hot signal queries; exits 1 if any reads a whole table"""
+    from migrations import check_query_plans
+    failed = False
+    for name, result in check_query_plans().items():
+        failed = failed or bool(result['problems'])
+        print(f"{'FAIL' if result['problems'] else 'ok'} {name}: {' | '.join(result['plan'])}")
+    if failed:
+        raise SystemExit(1)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,202 @@
+import os
+import re
+import time
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import MetaData, delete, func, insert, select, text, union_all
+from sqlalchemy.orm import aliased
+from app import db
+from models import Signal
+
+logger = logging.getLogger(__name__)
+
+# Closed signals older than this many days are moved out of the hot signals table
+ARCHIVE_AFTER_DAYS = int(os.environ.get("SIGNAL_ARCHIVE_DAYS", 90))
+
+# Seconds a process trusts its list of archive months before reading the catalog again
+ARCHIVE_MONTHS_TTL = float(os.environ.get("ARCHIVE_MONTHS_TTL", 60))
+
+ARCHIVE_TABLE = 'signals_archive'
+ARCHIVE_MONTH = re.compile(r'^signals_archive_(\d{4})(\d{2})$')
+
+# Table objects for the archive tables, built from the signals table on first use
+archive_metadata = MetaData()
+
+# (loaded_at, months) from the last catalog read in this process
+_months_cache = None
+
+
+def _month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def _next_month(month):
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _table(name):
+    table = archive_metadata.tables.get(name)
+    if table is None:
+        table = Signal.__table__.to_metadata(archive_metadata, name=name)
+    return table
+
+
+def _columns(table):
+    return [table.c[c.name] for c in Signal.__table__.columns]
+
+
+def archive_months():
+    """
+    Months that have an archive table or partition, oldest first
+
+    Every signal_history() call needs them, so the catalog is read at most once per
+    ARCHIVE_MONTHS_TTL seconds per process; archiving in this process refreshes it
+    at once, other processes pick up a new month within the TTL.
+
+    Returns:
+    - List of datetimes for the first day of each month
+    """
+    global _months_cache
+    cached = _months_cache
+    if cached is not None and time.monotonic() - cached[0] < ARCHIVE_MONTHS_TTL:
+        return list(cached[1])
+
+    if db.engine.dialect.name == 'sqlite':
+        names = db.session.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'signals_archive_%'"
+        )).scalars()
+    else:
+        names = db.session.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :parent"
+        ), {'parent': ARCHIVE_TABLE}).scalars()
+    months = []
+    for name in names:
+        match = ARCHIVE_MONTH.match(name)
+        if match:
+            months.append(datetime(int(match.group(1)), int(match.group(2)), 1))
+    months.sort()
+    _months_cache = (time.monotonic(), months)
+    return list(months)
+
+
+def invalidate_archive_months():
+    """Make the next archive_months() call read the catalog"""
+    global _months_cache
+    _months_cache = None
+
+
+def _ensure_month(month):
+    """Create the archive table (SQLite) or partition (PostgreSQL) for a month"""
+    name = f"{ARCHIVE_TABLE}_{month:%Y%m}"
+    invalidate_archive_months()
+    if db.engine.dialect.name == 'sqlite':
+        table = _table(name)
+        table.create(db.session.connection(), checkfirst=True)
+        db.session.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{name}_pair_timestamp ON {name} (pair, timestamp)"
+        ))
+        return table
+
+    db.session.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {ARCHIVE_TABLE} "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+    ))
+    # Rows inserted into the parent are routed to the partition
+    return _table(ARCHIVE_TABLE)
+
+
+def signal_history(start=None):
+    """
+    Signal entity covering the hot table and every archive that can hold signals
+    from `start` on
+
+    When no archive overlaps the window this is Signal itself, so queries over
+    recent history never leave the hot table. Otherwise it is Signal aliased over
+    a UNION ALL of the hot table and the matching archive months (the PostgreSQL
+    planner prunes partitions from the same timestamp bound). Use it like Signal:
+    history = signal_history(start); db.session.query(history).filter(history.pair == ...).
+
+    Parameters:
+    - start: Earliest signal timestamp the query needs (None for all history)
+    """
+    months = archive_months()
+    if start is not None:
+        months = [m for m in months if _next_month(m) > start]
+    if not months:
+        return Signal
+
+    if db.engine.dialect.name == 'sqlite':
+        tables = [_table(f"{ARCHIVE_TABLE}_{month:%Y%m}") for month in months]
+    else:
+        tables = [_table(ARCHIVE_TABLE)]
+
+    branches = []
+    for table in [Signal.__table__, *tables]:
+        branch = select(*_columns(table))
+        if start is not None:
+            branch = branch.where(table.c.timestamp >= start)
+        branches.append(branch)
+    return aliased(Signal, union_all(*branches).subquery('signal_history'))
+
+
+def archive_signals(days=None, batch_size=1000):
+    """
+    Move closed signals older than `days` days into their month's archive
+
+    Each batch is copied and deleted in one transaction, so a signal is always in
+    exactly one place. Open signals are never moved; the rollups are unchanged,
+    since they count archived signals like any other.
+
+    Parameters:
+    - days: Age in days (default SIGNAL_ARCHIVE_DAYS, 90)
+    - batch_size: Signals moved per transaction
+
+    Returns:
+    - Number of signals archived
+    """
+    cutoff = datetime.now() - timedelta(days=ARCHIVE_AFTER_DAYS if days is None else days)
+    columns = [c.name for c in Signal.__table__.columns]
+    moved = 0
+    try:
+        while True:
+            rows = (db.session.query(Signal.id, Signal.timestamp)
+                    .filter(Signal.outcome.isnot(None), Signal.timestamp < cutoff)
+                    .order_by(Signal.timestamp).limit(batch_size).all())
+            if not rows:
+                break
+
+            by_month = {}
+            for signal_id, timestamp in rows:
+                by_month.setdefault(_month_start(timestamp), []).append(signal_id)
+            for month, ids in by_month.items():
+                table = _ensure_month(month)
+                db.session.execute(insert(table).from_select(
+                    columns, select(*[Signal.__table__.c[c] for c in columns]).where(Signal.id.in_(ids))
+                ))
+                db.session.execute(delete(Signal.__table__).where(Signal.id.in_(ids)))
+            db.session.commit()
+            # New months only show in the catalog once committed
+            invalidate_archive_months()
+            moved += len(rows)
+
+        if moved:
+            logger.info(f"Archived {moved} signals closed before {cutoff:%Y-%m-%d}")
+        return moved
+    except Exception as e:
+        logger.error(f"Error archiving signals: {e}")
+        db.session.rollback()
+        invalidate_archive_months()
+        raise
+
+
+def archive_stats():
+    """Signals per storage tier, for monitoring"""
+    history = signal_history()
+    hot = db.session.query(func.count(Signal.id)).scalar()
+    return {
+        'hot': hot,
+        'open': db.session.query(func.count(Signal.id)).filter(Signal.outcome.is_(None)).scalar(),
+        'archived': db.session.query(func.count(history.id)).scalar() - hot,
+        'archive_months': [f"{month:%Y-%m}" for month in archive_months()]
+    }
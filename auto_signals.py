@@ -5,8 +5,7 @@ import random
 from datetime import datetime, timedelta
 import requests
 import os
-from binance_api import BinanceAPI
-from tracker import WinrateTracker
+import registry
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -18,11 +17,17 @@ TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "5125770095")
 
 class SignalGenerator:
     def __init__(self):
-        self.binance_api = BinanceAPI()
-        self.tracker = WinrateTracker()
         self.running = False
         self.thread = None
         self.pairs = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "ADAUSDT", "SOLUSDT", "DOTUSDT"]
+    
+    @property
+    def binance_api(self):
+        return registry.get_binance_api()
+    
+    @property
+    def tracker(self):
+        return registry.get_tracker()
         
     def start(self):
         """Start the signal generator in a separate thread"""
@@ -31,6 +36,7 @@ class SignalGenerator:
             return
             
         self.running = True
+        self.binance_api.track_prices(self.pairs)
         self.thread = threading.Thread(target=self._run)
         self.thread.daemon = True
         self.thread.start()
@@ -121,6 +127,7 @@ class SignalGenerator:
             # Since we can't use async in this context, use the synchronous method
             from app import db
             from models import Signal
+            from rollups import record_signal
             
             # Create the signal record
             new_signal = Signal(
@@ -133,8 +140,9 @@ class SignalGenerator:
                 timestamp=datetime.now()
             )
             
-            # Add to database
+            # Add to database, counting it in the daily rollups in the same transaction
             db.session.add(new_signal)
+            record_signal(new_signal)
             db.session.commit()
             
             logger.info(f"Signal logged to database with ID {new_signal.id}")
@@ -223,6 +231,8 @@ def stop_signal_generator():
     """Stop the signal generator"""
     signal_generator.stop()
 
+registry.on_shutdown(stop_signal_generator)
+
 # For testing
 if __name__ == "__main__":
     start_signal_generator()
@@ -0,0 +1,246 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import pandas as pd
+from candles import CandleArrays
+
+logger = logging.getLogger(__name__)
+
+# Candle columns that can change a backtest result
+FINGERPRINT_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def nbytes(value):
+    """Approximate memory held by a cached candle frame or CandleArrays"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True).sum())
+    return getattr(value, 'nbytes', 0)
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU mapping with hit/miss counters
+
+    Bounded by entry count and, with max_bytes, by the total nbytes() of the values.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        size = nbytes(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._bytes += size - self._sizes.get(key, 0)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._entries.move_to_end(key)
+            # The newest entry always stays, even if it alone is over max_bytes
+            while len(self._entries) > 1 and (
+                    len(self._entries) > self.max_entries
+                    or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                evicted, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses}
+
+
+class BacktestCache:
+    """
+    Cache for backtest results
+
+    Entries are keyed by the request (pair, timeframe, window, strategy parameters)
+    and the close of the window's last candle, so a repeat of a request within the
+    same candle is answered before any candles are fetched. Each entry also keeps
+    a fingerprint of the candles it ran on; a caller that already holds candles
+    passes theirs and only gets a result computed on identical data. The memory
+    tier is a bounded LRU; the optional disk tier keeps JSON copies of entries
+    across restarts.
+    """
+
+    def __init__(self, max_entries=128, cache_dir=None, max_disk_entries=1024):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def fingerprint(data):
+        """Hash the timestamps and OHLCV values of a candle frame or CandleArrays"""
+        columns = [c for c in FINGERPRINT_COLUMNS if c in data.columns]
+        if isinstance(data, CandleArrays):
+            digest = hashlib.blake2b(data.timestamps.tobytes(), digest_size=16)
+            for column in columns:
+                digest.update(column.encode())
+                digest.update(data[column].tobytes())
+            return digest.hexdigest()
+        hashed = pd.util.hash_pandas_object(data[columns], index=True).to_numpy()
+        return hashlib.blake2b(hashed.tobytes(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def make_key(pair, timeframe, days, params, window_end):
+        """
+        Build the cache key for a backtest request
+
+        Parameters:
+        - window_end: Epoch ms at which the last closed candle of the window closes
+        """
+        payload = json.dumps({
+            'pair': pair,
+            'timeframe': timeframe,
+            'days': days,
+            'params': params,
+            'window_end': window_end
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key, fingerprint=None):
+        """
+        Return a copy of the cached result for key, or None on a miss
+
+        Parameters:
+        - fingerprint: Fingerprint of the caller's candles; an entry computed on
+          different candles is then a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if fingerprint is not None and entry['fingerprint'] != fingerprint:
+                    self.misses += 1
+                    return None
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry['result'])
+
+        entry = self._read_disk(key)
+
+        with self._lock:
+            if entry is None or (fingerprint is not None and entry['fingerprint'] != fingerprint):
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, entry)
+            return dict(entry['result'])
+
+    def put(self, key, result, fingerprint=None):
+        """Cache a backtest result and the fingerprint of its candles in memory and, if configured, on disk"""
+        entry = {'result': dict(result), 'fingerprint': fingerprint}
+        with self._lock:
+            self._store(key, entry)
+        self._write_disk(key, entry)
+
+    def clear(self):
+        """Drop every memory entry (disk entries are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups > 0 else 0,
+                'disk_enabled': bool(self.cache_dir)
+            }
+
+    def _store(self, key, entry):
+        # Caller holds the lock
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            path = self._path(key)
+            with open(path) as f:
+                entry = json.load(f)
+            if 'result' not in entry:
+                # Written before entries carried a fingerprint
+                return None
+            # Refresh recency so pruning drops the least recently used files
+            os.utime(path)
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Error reading backtest cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+        try:
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except Exception as e:
+            logger.error(f"Error writing backtest cache entry {key}: {e}")
+
+    def _prune_disk(self):
+        entries = [e for e in os.scandir(self.cache_dir) if e.name.endswith('.json')]
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+# Lower-timeframe candles fetched to settle ambiguous backtest candles
+drilldown_cache = LRUCache(max_entries=512)
+
+# Base and resampled candles of backtest_many runs, bounded by memory
+resample_cache = LRUCache(max_entries=1024,
+                          max_bytes=int(os.environ.get("RESAMPLE_CACHE_MB", 256)) * 1024 * 1024)
+
+# Shared instance used by every WinrateTracker in the process
+backtest_cache = BacktestCache(
+    max_entries=int(os.environ.get("BACKTEST_CACHE_SIZE", 128)),
+    cache_dir=os.environ.get("BACKTEST_CACHE_DIR") or None
+)
@@ -0,0 +1,502 @@
+import os
+import logging
+import itertools
+import random
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Direction codes used by the array-based engine
+LONG = 1
+SHORT = -1
+
+# Parameters of the moving average crossover strategy used by backtest_strategy
+DEFAULT_STRATEGY = {
+    'short_window': 20,
+    'long_window': 50,
+    'sl_pct': 0.05,
+    'tp1_pct': 0.05,
+    'tp2_pct': 0.08
+}
+
+
+def crossover_signals(close, ma_short, ma_long, sl_pct=0.05, tp1_pct=0.05, tp2_pct=0.08):
+    """
+    Find every moving average crossover in one pass
+
+    Parameters:
+    - close: Close prices of the warmed-up candles (no NaN rows)
+    - ma_short / ma_long: Moving averages aligned with close
+    - sl_pct, tp1_pct, tp2_pct: Stop loss and take profit distances from entry
+
+    Returns:
+    - Dict of arrays (index, direction, entry, sl, tp1, tp2), one element per signal.
+      `index` is the candle position inside the arrays passed in.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    ma_short = np.asarray(ma_short, dtype=np.float64)
+    ma_long = np.asarray(ma_long, dtype=np.float64)
+
+    prev_short, curr_short = ma_short[:-1], ma_short[1:]
+    prev_long, curr_long = ma_long[:-1], ma_long[1:]
+
+    # LONG signal: short MA crosses above long MA
+    long_mask = (prev_short <= prev_long) & (curr_short > curr_long)
+    # SHORT signal: short MA crosses below long MA
+    short_mask = (prev_short >= prev_long) & (curr_short < curr_long) & ~long_mask
+
+    index = np.flatnonzero(long_mask | short_mask) + 1
+    direction = np.where(long_mask[index - 1], LONG, SHORT)
+    entry = close[index]
+
+    is_long = direction == LONG
+    sl = np.where(is_long, entry * (1 - sl_pct), entry * (1 + sl_pct))
+    tp1 = np.where(is_long, entry * (1 + tp1_pct), entry * (1 - tp1_pct))
+    tp2 = np.where(is_long, entry * (1 + tp2_pct), entry * (1 - tp2_pct))
+
+    return {
+        'index': index,
+        'direction': direction,
+        'entry': entry,
+        'sl': sl,
+        'tp1': tp1,
+        'tp2': tp2
+    }
+
+
+class FirstTouchIndex:
+    """
+    Answers "first candle at or after `start` whose low/high touches a level" for many
+    trades at once. Built once per candle series from sparse min/max tables, so every
+    query is a vectorized binary descent instead of a scan over future candles.
+    """
+
+    def __init__(self, high, low):
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.size = len(self.low)
+
+        # Level k holds the min/max over windows of 2**k candles starting at each position
+        self._min_levels = [self.low]
+        self._max_levels = [self.high]
+        span = 1
+        while span * 2 <= self.size:
+            prev_min = self._min_levels[-1]
+            prev_max = self._max_levels[-1]
+            self._min_levels.append(np.minimum(prev_min[:-span], prev_min[span:]))
+            self._max_levels.append(np.maximum(prev_max[:-span], prev_max[span:]))
+            span *= 2
+
+    def first_low_at_or_below(self, start, level):
+        """Position of the first candle from `start` with low <= level (size if never)"""
+        return self._descend(self._min_levels, start, level, below=True)
+
+    def first_high_at_or_above(self, start, level):
+        """Position of the first candle from `start` with high >= level (size if never)"""
+        return self._descend(self._max_levels, start, level, below=False)
+
+    def touches_both(self, pos, direction, sl, tp1):
+        """Whether candle `pos` reaches both the SL and the TP level of each trade"""
+        pos = np.clip(pos, 0, max(self.size - 1, 0))
+        high = self.high[pos]
+        low = self.low[pos]
+        is_long = direction == LONG
+        return np.where(is_long, (low <= sl) & (high >= tp1), (high >= sl) & (low <= tp1))
+
+    def _descend(self, levels, start, level, below):
+        pos = np.array(start, dtype=np.int64, copy=True)
+        level = np.asarray(level, dtype=np.float64)
+
+        for k in range(len(levels) - 1, -1, -1):
+            span = 1 << k
+            table = levels[k]
+            fits = pos + span <= self.size
+            lookup = table[np.where(fits, pos, 0)]
+            # Jump over the whole window when none of its candles touches the level
+            untouched = lookup > level if below else lookup < level
+            pos = np.where(fits & untouched, pos + span, pos)
+
+        return pos
+
+
+def simulate_trades(start, direction, entry, sl, tp1, close, touch_index):
+    """
+    Resolve every trade against the candle series in one batch
+
+    A trade is checked from its start candle onwards. SL is checked before TP, so a
+    candle touching both counts as a LOSS. Trades that never touch either level are
+    closed at the last close of the series.
+
+    Returns:
+    - Dict of arrays (outcome, entry, exit, return, duration, rr), one element per trade
+    """
+    start = np.asarray(start, dtype=np.int64)
+    direction = np.asarray(direction)
+    entry = np.asarray(entry, dtype=np.float64)
+    sl = np.asarray(sl, dtype=np.float64)
+    tp1 = np.asarray(tp1, dtype=np.float64)
+    size = touch_index.size
+
+    is_long = direction == LONG
+    sl_hit, tp_hit, exit_pos = first_exits(start, direction, sl, tp1, touch_index)
+
+    # If no exit found (end of data), use last price
+    last_close = close[-1] if size else np.nan
+    exit_price = np.where(sl_hit, sl, np.where(tp_hit, tp1, last_close))
+    exit_pos = np.where(sl_hit | tp_hit, exit_pos, size - 1)
+
+    end_win = np.where(is_long, exit_price > entry, exit_price < entry)
+    win = np.where(sl_hit, False, np.where(tp_hit, True, end_win))
+    ret, rr = trade_returns(direction, entry, sl, tp1, exit_price)
+
+    return {
+        'outcome': np.where(win, 'WIN', 'LOSS'),
+        'entry': entry,
+        'exit': exit_price,
+        'return': ret,
+        # Candles from entry to exit, a proxy for duration
+        'duration': exit_pos - start,
+        'rr': rr,
+        # Exit candle touched both SL and TP, so the order of the touches is unknown
+        'ambiguous': sl_hit & (touch_index.touches_both(exit_pos, direction, sl, tp1))
+    }
+
+
+def first_exits(start, direction, sl, tp1, touch_index):
+    """
+    Find where each trade first touches its SL or TP
+
+    Returns:
+    - (sl_hit, tp_hit, exit_pos) arrays. SL wins when both levels are touched in the
+      same candle; exit_pos equals touch_index.size for trades that never exit.
+    """
+    is_long = direction == LONG
+    is_short = ~is_long
+
+    sl_pos = np.empty(len(start), dtype=np.int64)
+    tp_pos = np.empty(len(start), dtype=np.int64)
+    sl_pos[is_long] = touch_index.first_low_at_or_below(start[is_long], sl[is_long])
+    tp_pos[is_long] = touch_index.first_high_at_or_above(start[is_long], tp1[is_long])
+    sl_pos[is_short] = touch_index.first_high_at_or_above(start[is_short], sl[is_short])
+    tp_pos[is_short] = touch_index.first_low_at_or_below(start[is_short], tp1[is_short])
+
+    sl_hit = (sl_pos <= tp_pos) & (sl_pos < touch_index.size)
+    tp_hit = tp_pos < sl_pos
+    return sl_hit, tp_hit, np.minimum(sl_pos, tp_pos)
+
+
+def trade_returns(direction, entry, sl, tp1, exit_price):
+    """Percentage return and planned risk/reward ratio of each trade"""
+    is_long = direction == LONG
+    ret = np.where(is_long, (exit_price - entry) / entry * 100, (entry - exit_price) / entry * 100)
+    risk = np.where(is_long, (entry - sl) / entry * 100, (sl - entry) / entry * 100)
+    reward = np.where(is_long, (tp1 - entry) / entry * 100, (entry - tp1) / entry * 100)
+    safe_risk = np.where(risk > 0, risk, 1.0)
+    rr = np.where(risk > 0, reward / safe_risk, 0.0)
+    return ret, rr
+
+
+def summarize_trades(results):
+    """Aggregate simulated trades into winrate, R:R and return statistics"""
+    total = len(results['outcome'])
+    if total == 0:
+        return {'winrate': 0, 'avg_rr': 0, 'best_case': 0, 'worst_case': 0, 'total_signals': 0}
+
+    wins = int(np.count_nonzero(results['outcome'] == 'WIN'))
+    return {
+        'winrate': (wins / total) * 100,
+        'avg_rr': float(np.mean(results['rr'])),
+        'best_case': float(np.max(results['return'])),
+        'worst_case': float(np.min(results['return'])),
+        'total_signals': total
+    }
+
+
+def run_crossover_strategy(close, high, low, valid, moving_averages, params, touch_index):
+    """
+    Backtest one parameter set of the crossover strategy on prepared arrays
+
+    Parameters:
+    - close, high, low: Full candle arrays
+    - valid: Boolean mask of rows without NaN in the source frame
+    - moving_averages: Dict of window -> rolling mean of close, shared between runs
+    - params: Strategy parameters (see DEFAULT_STRATEGY)
+    - touch_index: FirstTouchIndex built over high/low
+
+    Returns:
+    - Dict of trade result arrays as returned by simulate_trades
+    """
+    ma_short = moving_averages[params['short_window']]
+    ma_long = moving_averages[params['long_window']]
+    rows = valid & ~np.isnan(ma_short) & ~np.isnan(ma_long)
+
+    found = crossover_signals(close[rows], ma_short[rows], ma_long[rows],
+                              params['sl_pct'], params['tp1_pct'], params['tp2_pct'])
+
+    # Signal positions are relative to the warmed-up rows, as in backtest_strategy
+    return simulate_trades(found['index'], found['direction'], found['entry'],
+                           found['sl'], found['tp1'], close, touch_index)
+
+
+def parameter_grid(param_ranges):
+    """Expand a dict of parameter -> candidate values into every valid combination"""
+    ranges = {**{k: [v] for k, v in DEFAULT_STRATEGY.items()}, **param_ranges}
+    keys = list(ranges)
+    combos = []
+    for values in itertools.product(*(ranges[k] for k in keys)):
+        params = dict(zip(keys, values))
+        if params['short_window'] >= params['long_window']:
+            continue
+        combos.append(params)
+    return combos
+
+
+def sample_parameters(param_ranges, n_iter, seed=None):
+    """Draw up to n_iter distinct combinations from the parameter grid"""
+    combos = parameter_grid(param_ranges)
+    if n_iter >= len(combos):
+        return combos
+    return random.Random(seed).sample(combos, n_iter)
+
+
+# Arrays shared with sweep worker processes, set once per worker by the initializer
+_sweep_state = {}
+
+# Default size of the sweep process pool
+SWEEP_WORKERS = int(os.environ.get("SWEEP_WORKERS", 2))
+
+
+def _sweep_context():
+    """
+    Start method for sweep workers
+
+    The web process runs Flask, the bot, the REST loop and the price stream in
+    threads; a forked child would inherit their locks in whatever state they were
+    in and can deadlock. Workers are started fresh instead: from a fork server that
+    has only imported this module, or by spawn where that is unavailable. As with
+    any spawned worker, a script calling this must keep its own startup under
+    `if __name__ == '__main__'` (gunicorn's entry point already does).
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _init_sweep_worker(state):
+    _sweep_state.clear()
+    _sweep_state.update(state)
+    _sweep_state['touch_index'] = FirstTouchIndex(state['high'], state['low'])
+
+
+def _run_sweep_combo(params):
+    state = _sweep_state
+    results = run_crossover_strategy(state['close'], state['high'], state['low'], state['valid'],
+                                     state['moving_averages'], params, state['touch_index'])
+    stats = summarize_trades(results)
+    returns = results['return']
+    return {
+        **params,
+        **stats,
+        'avg_return': float(np.mean(returns)) if len(returns) else 0,
+        'total_return': float(np.sum(returns)) if len(returns) else 0
+    }
+
+
+def sweep_parameters(pipeline, combos, max_workers=None, sort_by='winrate'):
+    """
+    Backtest every parameter combination and rank the results
+
+    The moving averages needed by all combinations come from the shared indicator
+    pipeline, so each window is computed once, and are shipped to each worker
+    process a single time through the pool initializer.
+
+    Parameters:
+    - max_workers: Size of the process pool (default SWEEP_WORKERS; 1 runs in-process)
+
+    Returns:
+    - List of result rows sorted by `sort_by` (best first), each with a 1-based rank
+    """
+    windows = sorted({p['short_window'] for p in combos} | {p['long_window'] for p in combos})
+    state = {
+        'close': pipeline.column('close'),
+        'high': pipeline.column('high'),
+        'low': pipeline.column('low'),
+        'valid': pipeline.complete_rows(),
+        'moving_averages': {w: pipeline.get('sma', window=w) for w in windows}
+    }
+
+    max_workers = max_workers or SWEEP_WORKERS
+    if max_workers == 1 or len(combos) <= 1:
+        _init_sweep_worker(state)
+        rows = [_run_sweep_combo(params) for params in combos]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=_sweep_context(),
+                                 initializer=_init_sweep_worker, initargs=(state,)) as pool:
+            rows = list(pool.map(_run_sweep_combo, combos, chunksize=max(1, len(combos) // 32)))
+
+    rows.sort(key=lambda r: (r[sort_by], r['total_return']), reverse=True)
+    for rank, row in enumerate(rows, start=1):
+        row['rank'] = rank
+    return rows
+
+
+def _extend_rolling_mean(tail, chunk, window, seen):
+    """Rolling mean over `chunk`, continuing from the closes kept in `tail`"""
+    values = np.concatenate([tail, chunk])
+    sums = np.concatenate([[0.0], np.cumsum(values)])
+    ends = np.arange(len(tail) + 1, len(values) + 1)
+    means = np.full(len(chunk), np.nan)
+    # A candle gets a value once `window` closes are available up to it
+    ready = (seen + np.arange(1, len(chunk) + 1) >= window) & (ends >= window)
+    means[ready] = (sums[ends[ready]] - sums[ends[ready] - window]) / window
+    return means
+
+
+class WalkForward:
+    """
+    Incremental walk-forward evaluation of the crossover strategy
+
+    Candles are fed chunk by chunk with advance(). Moving averages continue from the
+    closes kept at the end of the previous chunk, new crossovers open trades, and
+    pending trades are resolved against the new candles only, so every candle is
+    processed once however many folds are reported.
+
+    Unlike backtest_strategy, trade positions here are absolute candle positions.
+    """
+
+    def __init__(self, params=None):
+        self.params = {**DEFAULT_STRATEGY, **(params or {})}
+        self.position = 0
+        self._keep = max(self.params['short_window'], self.params['long_window']) - 1
+        self._tail = np.empty(0)
+        self._last = None
+        self._pending = {k: np.empty(0, dtype=t) for k, t in
+                         [('start', np.int64), ('direction', np.int64), ('entry', np.float64),
+                          ('sl', np.float64), ('tp1', np.float64)]}
+        # Closed trades as (exit position, win, return, rr), oldest first
+        self.closed = deque()
+
+    @property
+    def pending_count(self):
+        return len(self._pending['start'])
+
+    def advance(self, close, high, low):
+        """Process the next chunk of candles; returns the number of trades opened"""
+        close = np.asarray(close, dtype=np.float64)
+        if len(close) == 0:
+            return 0
+        params = self.params
+
+        ma_short = _extend_rolling_mean(self._tail, close, params['short_window'], self.position)
+        ma_long = _extend_rolling_mean(self._tail, close, params['long_window'], self.position)
+
+        # Prepend the last processed candle so crossovers on the chunk boundary are found
+        prev = self._last or (np.nan, np.nan, np.nan)
+        found = crossover_signals(np.concatenate([[prev[0]], close]),
+                                  np.concatenate([[prev[1]], ma_short]),
+                                  np.concatenate([[prev[2]], ma_long]),
+                                  params['sl_pct'], params['tp1_pct'], params['tp2_pct'])
+
+        opened = {
+            'start': self.position + found['index'] - 1,
+            'direction': found['direction'],
+            'entry': found['entry'],
+            'sl': found['sl'],
+            'tp1': found['tp1']
+        }
+        pending = {k: np.concatenate([self._pending[k], opened[k]]) for k in self._pending}
+        self._resolve(pending, high, low)
+
+        self.position += len(close)
+        self._tail = np.concatenate([self._tail, close])[-self._keep:] if self._keep else np.empty(0)
+        self._last = (close[-1], ma_short[-1], ma_long[-1])
+        return len(opened['start'])
+
+    def _resolve(self, pending, high, low):
+        touch_index = FirstTouchIndex(high, low)
+        local_start = np.maximum(pending['start'] - self.position, 0)
+        sl_hit, tp_hit, exit_pos = first_exits(local_start, pending['direction'],
+                                               pending['sl'], pending['tp1'], touch_index)
+        done = sl_hit | tp_hit
+
+        exit_price = np.where(sl_hit, pending['sl'], pending['tp1'])[done]
+        ret, rr = trade_returns(pending['direction'][done], pending['entry'][done],
+                                pending['sl'][done], pending['tp1'][done], exit_price)
+        order = np.argsort(exit_pos[done], kind='stable')
+        for pos, win, r, q in zip((exit_pos[done] + self.position)[order], tp_hit[done][order],
+                                  ret[order], rr[order]):
+            self.closed.append((int(pos), bool(win), float(r), float(q)))
+
+        self._pending = {k: v[~done] for k, v in pending.items()}
+
+    def window_stats(self, start, end):
+        """Statistics of the trades that closed in candle positions [start, end)"""
+        trades = [t for t in self.closed if start <= t[0] < end]
+        return _closed_trade_stats(trades)
+
+    def forget_before(self, position):
+        """Drop closed trades that exited before `position`"""
+        while self.closed and self.closed[0][0] < position:
+            self.closed.popleft()
+
+
+def _closed_trade_stats(trades):
+    total = len(trades)
+    if total == 0:
+        return {'trades': 0, 'winrate': 0, 'avg_rr': 0, 'avg_return': 0, 'total_return': 0}
+    wins = sum(1 for t in trades if t[1])
+    returns = [t[2] for t in trades]
+    return {
+        'trades': total,
+        'winrate': (wins / total) * 100,
+        'avg_rr': sum(t[3] for t in trades) / total,
+        'avg_return': sum(returns) / total,
+        'total_return': sum(returns)
+    }
+
+
+def walk_forward(close, high, low, train_size, test_size, params=None):
+    """
+    Slide a train/test window across a candle history
+
+    The first `train_size` candles warm up the strategy; each following block of
+    `test_size` candles is one fold. Train stats cover trades closed in the
+    `train_size` candles before the fold, test stats the trades closed inside it.
+
+    Returns:
+    - List of per-fold dicts with candle positions and train/test statistics
+    """
+    close = np.asarray(close, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    walker = WalkForward(params)
+
+    walker.advance(close[:train_size], high[:train_size], low[:train_size])
+
+    folds = []
+    test_start = train_size
+    while test_start < len(close):
+        test_end = min(test_start + test_size, len(close))
+        train_stats = walker.window_stats(test_start - train_size, test_start)
+        opened = walker.advance(close[test_start:test_end], high[test_start:test_end],
+                                low[test_start:test_end])
+        folds.append({
+            'fold': len(folds) + 1,
+            'train_start': test_start - train_size,
+            'test_start': test_start,
+            'test_end': test_end,
+            'train': train_stats,
+            'test': walker.window_stats(test_start, test_end),
+            'opened': opened,
+            'pending': walker.pending_count
+        })
+        # Trades closed before the next fold's train window are no longer needed
+        walker.forget_before(test_end - train_size)
+        test_start = test_end
+
+    return folds
@@ -1,15 +1,27 @@
 import os
+import json
+import time
+import asyncio
 import logging
 import pandas as pd
 import numpy as np
 import random
+import zlib
 from datetime import datetime, timedelta
+from candle_store import COLUMNS, CandleStore, frame_from_columns, to_epoch_ms
+from binance_client import BinanceRESTClient
+from price_stream import PriceStream
+from exchange_info import ExchangeInfoCache
+from candles import OHLCV, CandleArrays
 
 # Configure logging
 logging.basicConfig(level=logging.INFO,
                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Most klines Binance returns per request
+KLINES_LIMIT = 1000
+
 # Define timeframe interval constants for demo
 class DemoIntervals:
     KLINE_INTERVAL_1MINUTE = '1m'
@@ -25,19 +37,91 @@ class DemoIntervals:
     KLINE_INTERVAL_3DAY = '3d'
     KLINE_INTERVAL_1WEEK = '1w'
 
+# Candle intervals the app accepts from users
+TIMEFRAMES = ('1m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '12h', '1d', '3d', '1w')
+
+def interval_to_timedelta(timeframe):
+    """Length of one candle of the given interval (e.g. '15m', '4h', '1d', '1w')"""
+    units = {'m': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+    unit = units.get(timeframe[-1:])
+    if unit is None:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+    return timedelta(**{unit: int(timeframe[:-1])})
+
+# Binance weekly candles open on Monday 00:00 UTC; every other interval is aligned to the epoch
+WEEK_ORIGIN_MS = 4 * 24 * 60 * 60 * 1000
+
+def _grid(first_ms, last_ms, step_ms):
+    """Candle open times from first_ms to last_ms inclusive"""
+    return pd.DatetimeIndex(pd.to_datetime(np.arange(first_ms, last_ms + 1, step_ms), unit='ms'))
+
 class BinanceAPI:
-    def __init__(self):
+    def __init__(self, seed=None, candle_store=None, base_url=None, ws_url=None):
         # Get API keys from environment
         self.api_key = os.environ.get("BINANCE_API_KEY", "K4imTSPtLipPhOEQP1BXKCSmshiEldyMhZtHxxP4fGqEHsSeskglltZqE9DGE44g")
         self.api_secret = os.environ.get("BINANCE_API_SECRET", "DFWScLQ83OpMCqmtj6pJrs2Z36OdMXzNWudwVimbRR9AJL46X3yHynG7t6traHrf")
         
-        # For demo purposes, using simulated methods
+        # Seed for simulated market data (BINANCE_SIM_SEED makes backtests reproducible)
+        if seed is None and os.environ.get("BINANCE_SIM_SEED"):
+            seed = int(os.environ["BINANCE_SIM_SEED"])
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        
+        # Optional on-disk candle store (CANDLE_STORE_DIR) so history is only fetched once
+        if candle_store is None and os.environ.get("CANDLE_STORE_DIR"):
+            candle_store = CandleStore(os.environ["CANDLE_STORE_DIR"])
+        self.candle_store = candle_store
+        
+        # Live REST client when a base URL is given (BINANCE_BASE_URL), simulated data otherwise
+        base_url = base_url or os.environ.get("BINANCE_BASE_URL")
+        self.rest = None
         try:
-            logger.info("Initializing simulated API client for demo purposes")
+            if base_url:
+                logger.info(f"Initializing Binance REST client for {base_url}")
+                self.rest = BinanceRESTClient(
+                    base_url, self.api_key, self.api_secret,
+                    max_connections=int(os.environ.get("BINANCE_MAX_CONNECTIONS", 10)),
+                    weight_limit=int(os.environ.get("BINANCE_WEIGHT_LIMIT", 1200))
+                )
+            else:
+                logger.info("Initializing simulated API client for demo purposes")
             self.client = True
         except Exception as e:
             logger.error(f"Failed to initialize API client: {e}")
             self.client = None
+        
+        # Exchange metadata, loaded once and refreshed in the background
+        self.exchange_info = ExchangeInfoCache(self._load_exchange_info,
+                                               ttl=float(os.environ.get("EXCHANGE_INFO_TTL", 3600)))
+        
+        # Streamed ticker prices (BINANCE_WS_URL) answer get_current_price without a REST call
+        ws_url = ws_url or os.environ.get("BINANCE_WS_URL")
+        self.price_max_age = float(os.environ.get("BINANCE_PRICE_MAX_AGE", 5))
+        self.price_stream = None
+        if ws_url:
+            self.price_stream = PriceStream(ws_url)
+            self.price_stream.start(self.rest.loop if self.rest is not None else None)
+    
+    def track_prices(self, symbols):
+        """Stream prices for symbols so get_current_price can serve them from memory"""
+        if self.price_stream is not None:
+            self.price_stream.subscribe(symbols)
+    
+    def _streamed_price(self, symbol):
+        """Fresh streamed price for symbol, or None (and subscribe it) on a miss"""
+        if self.price_stream is None:
+            return None
+        price = self.price_stream.table.get(symbol, max_age=self.price_max_age)
+        if price is None:
+            self.price_stream.subscribe([symbol])
+        return price
+    
+    def close(self):
+        """Stop the price stream and release the REST connection pool"""
+        if self.price_stream is not None:
+            self.price_stream.stop()
+        if self.rest is not None:
+            self.rest.close()
     
     def get_current_price(self, symbol):
         """Get current price and 24h change for a symbol - Simulated for demo"""
@@ -45,6 +129,13 @@ class BinanceAPI:
             # Format symbol properly (remove / if present)
             symbol = symbol.replace('/', '')
             
+            streamed = self._streamed_price(symbol)
+            if streamed is not None:
+                return streamed
+            
+            if self.rest is not None:
+                return self._parse_ticker(self.rest.request_sync('GET', '/api/v3/ticker/24hr', {'symbol': symbol}))
+            
             # Generate random price based on symbol for demo purposes
             if 'BTC' in symbol:
                 price = round(random.uniform(50000, 60000), 2)
@@ -66,7 +157,146 @@ class BinanceAPI:
             logger.error(f"Error getting price: {e}")
             return None
     
-    def get_historical_data(self, pair, timeframe='4h', days=90):
+    async def get_current_price_async(self, symbol):
+        """Async get_current_price; live requests share the client's connection pool"""
+        if self.rest is None:
+            return self.get_current_price(symbol)
+        try:
+            symbol = symbol.replace('/', '')
+            streamed = self._streamed_price(symbol)
+            if streamed is not None:
+                return streamed
+            return self._parse_ticker(await self.rest.request_async('GET', '/api/v3/ticker/24hr', {'symbol': symbol}))
+        except Exception as e:
+            logger.error(f"Error getting price: {e}")
+            return None
+    
+    def _parse_ticker(self, ticker):
+        return {
+            'symbol': ticker['symbol'],
+            'price': float(ticker['lastPrice']),
+            'change_24h': float(ticker['priceChangePercent'])
+        }
+    
+    def get_current_prices(self, symbols=None):
+        """
+        Get current prices and 24h changes for many symbols in one call
+        
+        Served from the price stream when every symbol is fresh there, otherwise from
+        a single ticker request (or simulated for demo). Symbols the exchange does not
+        list are never requested and come back as NaN rows.
+        
+        Parameters:
+        - symbols: Symbols or pairs (e.g. ['BTCUSDT', 'ETH/USDT']), None for all symbols
+        
+        Returns:
+        - DataFrame indexed by symbol with price and change_24h columns (NaN where a
+          symbol has no price)
+        """
+        try:
+            symbols = self._format_symbols(symbols)
+            listed = self._listed_symbols(symbols)
+            streamed = self._streamed_prices(listed)
+            if streamed is not None:
+                return streamed.reindex(symbols)
+            
+            if self.rest is not None:
+                tickers = []
+                if listed is None or listed:
+                    params, weight = self._tickers_request(listed)
+                    tickers = self.rest.request_sync('GET', '/api/v3/ticker/24hr', params, weight=weight)
+                return self._parse_tickers(tickers, symbols)
+            
+            prices = self._simulate_prices(listed)
+            return prices.reindex(symbols) if symbols is not None else prices
+        
+        except Exception as e:
+            logger.error(f"Error getting prices: {e}")
+            return None
+    
+    async def get_current_prices_async(self, symbols=None):
+        """Async get_current_prices"""
+        if self.rest is None:
+            return self.get_current_prices(symbols)
+        try:
+            symbols = self._format_symbols(symbols)
+            listed = self._listed_symbols(symbols)
+            streamed = self._streamed_prices(listed)
+            if streamed is not None:
+                return streamed.reindex(symbols)
+            tickers = []
+            if listed is None or listed:
+                params, weight = self._tickers_request(listed)
+                tickers = await self.rest.request_async('GET', '/api/v3/ticker/24hr', params, weight=weight)
+            return self._parse_tickers(tickers, symbols)
+        except Exception as e:
+            logger.error(f"Error getting prices: {e}")
+            return None
+    
+    def _format_symbols(self, symbols):
+        if symbols is None:
+            return None
+        # Drop duplicates but keep the caller's order
+        return list(dict.fromkeys(s.replace('/', '').strip().upper() for s in symbols if s.strip()))
+    
+    def _listed_symbols(self, symbols):
+        """
+        The symbols the exchange lists, in order
+        
+        A ticker request naming an unknown symbol fails as a whole, so unknown ones
+        are left out (callers return NaN for them). Symbols pass unchecked while
+        exchange info is unavailable.
+        """
+        if symbols is None or self.exchange_info.snapshot() is None:
+            return symbols
+        listed = [s for s in symbols if self.exchange_info.symbol(s) is not None]
+        if len(listed) < len(symbols):
+            known = set(listed)
+            unknown = [s for s in symbols if s not in known]
+            logger.warning(f"No price for unknown symbols: {', '.join(unknown)}")
+        return listed
+    
+    def _streamed_prices(self, symbols):
+        """Prices for symbols from the price stream if all of them are fresh, else None"""
+        if self.price_stream is None or symbols is None:
+            return None
+        snapshot = self.price_stream.table.snapshot()
+        cutoff = time.time() - self.price_max_age
+        missing = [s for s in symbols if s not in snapshot or snapshot[s][2] < cutoff]
+        if missing:
+            self.price_stream.subscribe(missing)
+            return None
+        prices = pd.DataFrame([snapshot[s][:2] for s in symbols], columns=['price', 'change_24h'],
+                              index=pd.Index(symbols, name='symbol'))
+        return prices
+    
+    def _tickers_request(self, symbols):
+        """Query parameters and request weight of a ticker/24hr call for symbols"""
+        if symbols is None:
+            return {}, 80
+        weight = 2 if len(symbols) <= 20 else 40 if len(symbols) <= 100 else 80
+        return {'symbols': json.dumps(symbols, separators=(',', ':'))}, weight
+    
+    def _parse_tickers(self, tickers, symbols=None):
+        prices = pd.DataFrame(tickers, columns=['symbol', 'lastPrice', 'priceChangePercent'])
+        prices = prices.rename(columns={'lastPrice': 'price', 'priceChangePercent': 'change_24h'})
+        prices = prices.set_index('symbol').astype(np.float64)
+        return prices.reindex(symbols) if symbols is not None else prices
+    
+    def _simulate_prices(self, symbols):
+        """Simulated prices for symbols in one vectorized draw"""
+        if symbols is None:
+            symbols = [s['symbol'] for s in self.get_exchange_info()['symbols']]
+        is_btc = np.array(['BTC' in s for s in symbols], dtype=bool)
+        is_eth = np.array(['ETH' in s for s in symbols], dtype=bool) & ~is_btc
+        low = np.select([is_btc, is_eth], [50000, 3000], 1)
+        high = np.select([is_btc, is_eth], [60000, 4000], 1000)
+        return pd.DataFrame({
+            'price': np.round(self.rng.uniform(low, high), 2),
+            'change_24h': np.round(self.rng.uniform(-5, 5, len(symbols)), 2)
+        }, index=pd.Index(symbols, name='symbol'))
+    
+    def get_historical_data(self, pair, timeframe='4h', days=90, start_time=None, end_time=None):
         """
         Get simulated historical OHLCV data
         
@@ -74,6 +304,8 @@ class BinanceAPI:
         - pair: Trading pair (e.g., 'BTC/USDT')
         - timeframe: Candle interval (e.g., '1h', '4h', '1d')
         - days: Number of days of historical data to fetch
+        - start_time / end_time: Optional datetimes (naive ones in UTC) selecting the candles opening in
+          [start_time, end_time) instead of the last `days` days
         
         Returns:
         - Pandas DataFrame with OHLCV data
@@ -100,84 +332,32 @@ class BinanceAPI:
             
             interval = interval_map.get(timeframe, DemoIntervals.KLINE_INTERVAL_4HOUR)
             
-            # For demo purposes, generate simulated price data
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            # Generate timestamps
-            if timeframe.endswith('m'):
-                # Minutes
-                minutes = int(timeframe[:-1])
-                freq = f"{minutes}min"
-            elif timeframe.endswith('h'):
-                # Hours
-                hours = int(timeframe[:-1])
-                freq = f"{hours}h"
-            elif timeframe.endswith('d'):
-                # Days
-                days_val = int(timeframe[:-1])
-                freq = f"{days_val}d"
-            elif timeframe.endswith('w'):
-                # Weeks
-                weeks = int(timeframe[:-1])
-                freq = f"{weeks}w"
+            # Candle open times are UTC epoch milliseconds, like exchange klines;
+            # naive start_time / end_time values are read as UTC
+            step_ms = int(interval_to_timedelta(timeframe).total_seconds() * 1000)
+            end_ms = int(to_epoch_ms([end_time])[0]) if end_time is not None else int(time.time() * 1000)
+            
+            if start_time is not None:
+                first_ms = int(to_epoch_ms([start_time])[0])
+            elif end_time is not None:
+                first_ms = end_ms - int(timedelta(days=days).total_seconds() * 1000)
             else:
-                freq = '4h'  # Default
-                
-            timestamps = pd.date_range(start=start_date, end=end_date, freq=freq)
+                # Align candles to interval boundaries like exchange klines (weeks open
+                # on Monday 00:00 UTC), so repeated requests within one candle period
+                # cover the same candles
+                origin_ms = WEEK_ORIGIN_MS if timeframe.endswith('w') else 0
+                end_ms = (end_ms - origin_ms) // step_ms * step_ms + origin_ms
+                span_ms = int(timedelta(days=days).total_seconds() * 1000)
+                first_ms = end_ms - span_ms // step_ms * step_ms
             
-            # Base price and volatility based on pair
-            if 'BTC' in symbol:
-                base_price = 50000
-                volatility = 2000
-            elif 'ETH' in symbol:
-                base_price = 3000
-                volatility = 150
+            # [start, end) for an explicit end_time, otherwise up to and including now
+            timestamps = _grid(first_ms, end_ms - 1 if end_time is not None else end_ms, step_ms)
+            
+            if self.candle_store is not None:
+                df = self._read_through_store(symbol, timeframe, timestamps,
+                                              bounded=start_time is not None or end_time is not None)
             else:
-                base_price = 100
-                volatility = 5
-            
-            # Generate simulated OHLCV data
-            data = []
-            prev_close = base_price
-            
-            for timestamp in timestamps:
-                # Generate candle data with realistic relationships
-                # (open near previous close, high > open and close, low < open and close)
-                open_price = prev_close * (1 + random.uniform(-0.005, 0.005))
-                change = random.uniform(-0.02, 0.02)
-                close = open_price * (1 + change)
-                high = max(open_price, close) * (1 + random.uniform(0.001, 0.01))
-                low = min(open_price, close) * (1 - random.uniform(0.001, 0.01))
-                volume = random.uniform(base_price * 10, base_price * 100)
-                
-                row = [
-                    timestamp,
-                    open_price,
-                    high,
-                    low,
-                    close,
-                    volume,
-                    timestamp,  # close_time
-                    volume * close,  # quote_asset_volume
-                    random.randint(100, 1000),  # number_of_trades
-                    volume * 0.7,  # taker_buy_base_asset_volume
-                    volume * close * 0.7,  # taker_buy_quote_asset_volume
-                    0  # ignore
-                ]
-                
-                data.append(row)
-                prev_close = close
-            
-            # Create DataFrame
-            columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 
-                      'close_time', 'quote_asset_volume', 'number_of_trades',
-                      'taker_buy_base_asset_volume', 'taker_buy_quote_asset_volume', 'ignore']
-            
-            df = pd.DataFrame(data, columns=columns)
-            
-            # Set timestamp as index
-            df.set_index('timestamp', inplace=True)
+                df = self._fetch_candles(symbol, timeframe, timestamps)
             
             logger.info(f"Generated {len(df)} candles for {symbol} {timeframe}")
             
@@ -187,9 +367,205 @@ class BinanceAPI:
             logger.error(f"Error generating historical data: {e}")
             return None
     
+    def get_candles(self, pair, timeframe='4h', days=90, start_time=None, end_time=None,
+                    columns=OHLCV, dtype=None):
+        """
+        Historical candles as compact CandleArrays holding only `columns`
+        
+        Same selection as get_historical_data; dtype picks the float width of the
+        values (default CANDLE_DTYPE). Returns None if no data could be fetched.
+        """
+        data = self.get_historical_data(pair, timeframe, days, start_time, end_time)
+        if data is None:
+            return None
+        return CandleArrays.from_frame(data, columns, dtype)
+    
+    async def get_historical_data_async(self, pair, timeframe='4h', days=90, start_time=None, end_time=None):
+        """
+        Async get_historical_data
+        
+        Runs in a worker thread (candle store reads and DataFrame assembly block);
+        live kline requests still go through the shared connection pool.
+        """
+        return await asyncio.to_thread(self.get_historical_data, pair, timeframe, days, start_time, end_time)
+    
+    def _read_through_store(self, symbol, timeframe, timestamps, bounded=False):
+        """
+        Serve candles from the local candle store, fetching only what it is missing
+        
+        Closed candles outside the stored range are fetched once and appended to the
+        store; the still-open last candle is always fetched fresh and never stored.
+        A bounded read (explicit start_time / end_time, e.g. a drill-down into one
+        candle) is served from the store only if the store already covers it, and is
+        otherwise fetched as requested without touching the store: a series must stay
+        contiguous, so storing it would mean fetching the whole gap in between.
+        """
+        step_ms = int(interval_to_timedelta(timeframe).total_seconds() * 1000)
+        ts_ms = to_epoch_ms(timestamps)
+        now_ms = int(time.time() * 1000)
+        closed = ts_ms + step_ms <= now_ms
+        if len(ts_ms) == 0 or not closed.any():
+            return self._fetch_candles(symbol, timeframe, timestamps)
+        
+        first_ms = int(ts_ms[0])
+        last_closed_ms = int(ts_ms[closed][-1])
+        coverage = self.candle_store.coverage(symbol, timeframe)
+        
+        if coverage is not None and (first_ms - coverage[0]) % step_ms != 0:
+            # Requested candles are not on the stored grid (e.g. an arbitrary start_time)
+            return self._fetch_candles(symbol, timeframe, timestamps)
+        
+        if bounded and (coverage is None or first_ms < coverage[0] or last_closed_ms > coverage[1]):
+            return self._fetch_candles(symbol, timeframe, timestamps)
+        
+        if coverage is None:
+            self.candle_store.append(symbol, timeframe, step_ms,
+                                     self._fetch_candles(symbol, timeframe, timestamps[closed]))
+        else:
+            stored_first, stored_last = coverage
+            if first_ms < stored_first:
+                head = self._fetch_candles(symbol, timeframe, _grid(first_ms, stored_first - step_ms, step_ms),
+                                           end_price=self.candle_store.read(symbol, timeframe, stored_first,
+                                                                            stored_first)['open'][0])
+                self.candle_store.append(symbol, timeframe, step_ms, head)
+            if last_closed_ms > stored_last:
+                tail = self._fetch_candles(symbol, timeframe, _grid(stored_last + step_ms, last_closed_ms, step_ms),
+                                           start_price=self.candle_store.read(symbol, timeframe, stored_last,
+                                                                              stored_last)['close'][0])
+                self.candle_store.append(symbol, timeframe, step_ms, tail)
+        
+        stored = self.candle_store.read(symbol, timeframe, first_ms, last_closed_ms)
+        frames = [frame_from_columns(stored)]
+        if not closed.all():
+            frames.append(self._fetch_candles(symbol, timeframe, timestamps[~closed],
+                                              start_price=stored['close'][-1]))
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+    
+    def _fetch_candles(self, symbol, timeframe, timestamps, start_price=None, end_price=None):
+        """Candles opening at the given times (simulated unless a REST client is configured)"""
+        if self.rest is None:
+            return self._simulate_candles(symbol, timeframe, timestamps, start_price, end_price)
+        if len(timestamps) == 0:
+            return frame_from_columns({c: np.empty(0, dtype=t) for c, t in COLUMNS.items()})
+        ts_ms = to_epoch_ms(timestamps)
+        return frame_from_columns(self.rest.run(self._download_klines(symbol, timeframe, int(ts_ms[0]), int(ts_ms[-1]))))
+    
+    async def _download_klines(self, symbol, timeframe, start_ms, end_ms):
+        """
+        Klines opening in [start_ms, end_ms] as column arrays, fetched in parallel pages
+        
+        The range is split into chunks of KLINES_LIMIT candles that are requested
+        concurrently (bounded by the connection pool and the request-weight limiter).
+        Each page is written straight into preallocated column arrays at its candles'
+        grid positions as it arrives, which stitches the pages in timestamp order and
+        drops duplicates without keeping the raw pages around.
+        
+        Returns:
+        - Dict of column -> array in candle_store.COLUMNS layout (times in epoch ms)
+        """
+        step_ms = int(interval_to_timedelta(timeframe).total_seconds() * 1000)
+        n = (end_ms - start_ms) // step_ms + 1
+        columns = {c: np.zeros(n, dtype=t) for c, t in COLUMNS.items()}
+        filled = np.zeros(n, dtype=bool)
+        
+        chunk_starts = range(start_ms, end_ms + 1, step_ms * KLINES_LIMIT)
+        semaphore = asyncio.Semaphore(self.rest.max_connections)
+        
+        async def fetch_chunk(chunk_start):
+            async with semaphore:
+                return await self.rest.request('GET', '/api/v3/klines', {
+                    'symbol': symbol,
+                    'interval': timeframe,
+                    'startTime': chunk_start,
+                    'endTime': min(chunk_start + step_ms * (KLINES_LIMIT - 1), end_ms),
+                    'limit': KLINES_LIMIT
+                })
+        
+        for page in asyncio.as_completed([fetch_chunk(s) for s in chunk_starts]):
+            rows = await page
+            if not rows:
+                continue
+            open_times = np.array([row[0] for row in rows], dtype=np.int64)
+            offset = open_times - start_ms
+            # Keep candles on the requested grid; pages that overlap land on the same slots
+            on_grid = (offset % step_ms == 0) & (offset >= 0) & (offset < n * step_ms)
+            slots = offset[on_grid] // step_ms
+            for i, (column, dtype) in enumerate(COLUMNS.items()):
+                columns[column][slots] = np.array([row[i] for row in rows], dtype=dtype)[on_grid]
+            filled[slots] = True
+        
+        # Slots the exchange had no candle for (e.g. maintenance) are dropped
+        if not filled.all():
+            columns = {c: v[filled] for c, v in columns.items()}
+        return columns
+    
+    def _simulate_candles(self, symbol, timeframe, timestamps, start_price=None, end_price=None):
+        """
+        Generate simulated OHLCV candles for the given open times in one vectorized pass
+        
+        start_price continues the walk from a previous close; end_price scales the
+        walk so its last close meets a following open.
+        """
+        # Base price based on pair
+        if 'BTC' in symbol:
+            base_price = 50000
+        elif 'ETH' in symbol:
+            base_price = 3000
+        else:
+            base_price = 100
+        
+        if start_price is not None:
+            base_price = start_price
+        
+        # A seeded API replays the same series for the same symbol and interval
+        if self.seed is not None:
+            rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode()), zlib.crc32(timeframe.encode())])
+        else:
+            rng = self.rng
+        
+        n = len(timestamps)
+        open_change = rng.uniform(-0.005, 0.005, n)
+        change = rng.uniform(-0.02, 0.02, n)
+        high_wick = rng.uniform(0.001, 0.01, n)
+        low_wick = rng.uniform(0.001, 0.01, n)
+        volume = rng.uniform(base_price * 10, base_price * 100, n)
+        number_of_trades = rng.integers(100, 1001, n)
+        
+        # Open near previous close, close a random move away from the open
+        growth = (1 + open_change) * (1 + change)
+        prev_close = base_price * np.concatenate([[1.0], np.cumprod(growth)[:-1]])
+        open_price = prev_close * (1 + open_change)
+        close = open_price * (1 + change)
+        if end_price is not None and n > 0:
+            scale = end_price / close[-1]
+            open_price *= scale
+            close *= scale
+        # High above and low below both open and close
+        high = np.maximum(open_price, close) * (1 + high_wick)
+        low = np.minimum(open_price, close) * (1 - low_wick)
+        
+        index = pd.DatetimeIndex(timestamps, freq=None, name='timestamp')
+        
+        return pd.DataFrame({
+            'open': open_price,
+            'high': high,
+            'low': low,
+            'close': close,
+            'volume': volume,
+            'close_time': index,
+            'quote_asset_volume': volume * close,
+            'number_of_trades': number_of_trades,
+            'taker_buy_base_asset_volume': volume * 0.7,
+            'taker_buy_quote_asset_volume': volume * close * 0.7,
+            'ignore': np.zeros(n, dtype=np.int64)
+        }, index=index)
+    
     def get_account_balance(self):
         """Get simulated account balance information"""
         try:
+            if self.rest is not None:
+                return self._parse_balances(self.rest.request_sync('GET', '/api/v3/account', signed=True))
+            
             # Generate simulated balance data
             balances = [
                 {'asset': 'BTC', 'free': 0.5, 'locked': 0.1},
@@ -204,34 +580,83 @@ class BinanceAPI:
         except Exception as e:
             logger.error(f"Error getting account balance: {e}")
             return None
+    
+    async def get_account_balance_async(self):
+        """Async get_account_balance"""
+        if self.rest is None:
+            return self.get_account_balance()
+        try:
+            return self._parse_balances(await self.rest.request_async('GET', '/api/v3/account', signed=True))
+        except Exception as e:
+            logger.error(f"Error getting account balance: {e}")
+            return None
+    
+    def _parse_balances(self, account):
+        # Accounts list every asset; keep the ones actually held
+        balances = [{'asset': b['asset'], 'free': float(b['free']), 'locked': float(b['locked'])}
+                    for b in account.get('balances', [])]
+        return [b for b in balances if b['free'] or b['locked']]
 
     def get_exchange_info(self, symbol=None):
-        """Get simulated exchange information about symbols"""
+        """Get exchange information about symbols (served from the exchange info cache)"""
         try:
-            # Generate simulated exchange info
-            common_info = {
-                'timezone': 'UTC',
-                'serverTime': int(datetime.now().timestamp() * 1000)
-            }
-            
-            symbols = [
-                {'symbol': 'BTCUSDT', 'status': 'TRADING', 'baseAsset': 'BTC', 'quoteAsset': 'USDT'},
-                {'symbol': 'ETHUSDT', 'status': 'TRADING', 'baseAsset': 'ETH', 'quoteAsset': 'USDT'},
-                {'symbol': 'BNBUSDT', 'status': 'TRADING', 'baseAsset': 'BNB', 'quoteAsset': 'USDT'},
-                {'symbol': 'SOLUSDT', 'status': 'TRADING', 'baseAsset': 'SOL', 'quoteAsset': 'USDT'},
-                {'symbol': 'ADAUSDT', 'status': 'TRADING', 'baseAsset': 'ADA', 'quoteAsset': 'USDT'}
-            ]
-            
             if symbol:
-                # Return info for specific symbol
-                for s in symbols:
-                    if s['symbol'] == symbol:
-                        return s
-                return None
-            else:
-                # Return all symbols
-                return {**common_info, 'symbols': symbols}
+                return self.exchange_info.symbol(symbol)
+            snapshot = self.exchange_info.snapshot()
+            return snapshot.info if snapshot else None
             
         except Exception as e:
             logger.error(f"Error getting exchange info: {e}")
             return None
+    
+    async def get_exchange_info_async(self, symbol=None):
+        """Async get_exchange_info; only the first load waits on the network"""
+        if not self.exchange_info.stats()['loaded']:
+            await asyncio.to_thread(self.exchange_info.snapshot)
+        return self.get_exchange_info(symbol)
+    
+    def validate_pair(self, pair):
+        """
+        Check a user-supplied pair against the cached exchange info
+        
+        Returns:
+        - The exchange symbol (e.g. 'BTCUSDT' for 'btc/usdt') if it is listed and
+          trading, otherwise None. Pairs are accepted unchecked while exchange info
+          is unavailable.
+        """
+        symbol = pair.replace('/', '').replace('-', '').upper().strip()
+        if self.exchange_info.snapshot() is None:
+            logger.warning(f"Exchange info unavailable, not validating {symbol}")
+            return symbol
+        entry = self.exchange_info.symbol(symbol)
+        if entry is None or entry['status'] != 'TRADING':
+            return None
+        return symbol
+    
+    def _load_exchange_info(self):
+        """Fetch exchange information for every symbol (simulated unless a REST client is configured)"""
+        if self.rest is not None:
+            return self._parse_exchange_info(self.rest.request_sync('GET', '/api/v3/exchangeInfo'))
+        
+        # Generate simulated exchange info
+        common_info = {
+            'timezone': 'UTC',
+            'serverTime': int(datetime.now().timestamp() * 1000)
+        }
+        
+        symbols = [
+            {'symbol': 'BTCUSDT', 'status': 'TRADING', 'baseAsset': 'BTC', 'quoteAsset': 'USDT'},
+            {'symbol': 'ETHUSDT', 'status': 'TRADING', 'baseAsset': 'ETH', 'quoteAsset': 'USDT'},
+            {'symbol': 'BNBUSDT', 'status': 'TRADING', 'baseAsset': 'BNB', 'quoteAsset': 'USDT'},
+            {'symbol': 'SOLUSDT', 'status': 'TRADING', 'baseAsset': 'SOL', 'quoteAsset': 'USDT'},
+            {'symbol': 'ADAUSDT', 'status': 'TRADING', 'baseAsset': 'ADA', 'quoteAsset': 'USDT'},
+            {'symbol': 'DOTUSDT', 'status': 'TRADING', 'baseAsset': 'DOT', 'quoteAsset': 'USDT'}
+        ]
+        
+        return {**common_info, 'symbols': symbols}
+    
+    def _parse_exchange_info(self, info):
+        # Same shape as the simulated exchange info
+        symbols = [{'symbol': s['symbol'], 'status': s['status'], 'baseAsset': s['baseAsset'],
+                    'quoteAsset': s['quoteAsset']} for s in info.get('symbols', [])]
+        return {'timezone': info.get('timezone'), 'serverTime': info.get('serverTime'), 'symbols': symbols}
@@ -0,0 +1,246 @@
+import json
+import time
+import hmac
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from urllib.parse import urlencode
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Request weights of the endpoints used by BinanceAPI (Binance spot REST API)
+ENDPOINT_WEIGHTS = {
+    '/api/v3/ticker/24hr': 2,
+    '/api/v3/klines': 2,
+    '/api/v3/account': 20,
+    '/api/v3/exchangeInfo': 20
+}
+
+
+class BinanceAPIError(Exception):
+    """Error response from the Binance REST API"""
+
+    def __init__(self, status, message, code=None):
+        super().__init__(f"Binance API error {status}: {message}")
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+class RequestWeightLimiter:
+    """
+    Client-side view of Binance's per-minute request-weight budget
+
+    Calls wait in order until their weight fits into the current minute instead of
+    being sent and answered with 429. The count follows the server's
+    X-MBX-USED-WEIGHT-1M header, and a 429/418 Retry-After pauses every caller.
+    """
+
+    def __init__(self, limit=1200, window=60):
+        self.limit = limit
+        self.window = window
+        self.used = 0
+        self._window_start = self._current_window()
+        self._blocked_until = 0.0
+        self._lock = None
+
+    def _current_window(self):
+        return time.time() // self.window * self.window
+
+    def _roll_window(self):
+        window_start = self._current_window()
+        if window_start != self._window_start:
+            self._window_start = window_start
+            self.used = 0
+
+    async def acquire(self, weight):
+        """Wait until `weight` fits into the budget, then reserve it"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # The lock keeps waiting callers in FIFO order
+        async with self._lock:
+            while True:
+                now = time.time()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._roll_window()
+                if self.used + weight <= self.limit or self.used == 0:
+                    self.used += weight
+                    return
+                await asyncio.sleep(self._window_start + self.window - now)
+
+    def update_from_headers(self, headers):
+        """Adopt the server's used-weight count for the current minute"""
+        used = headers.get('X-MBX-USED-WEIGHT-1M') or headers.get('x-mbx-used-weight-1m')
+        if used is not None:
+            self._roll_window()
+            self.used = max(self.used, int(used))
+
+    def block_for(self, seconds):
+        """Hold every request back for `seconds` (after a 429 or 418 response)"""
+        self._blocked_until = max(self._blocked_until, time.time() + seconds)
+
+    def stats(self):
+        self._roll_window()
+        return {
+            'limit': self.limit,
+            'used': self.used,
+            'blocked_for': max(0.0, self._blocked_until - time.time())
+        }
+
+
+class BinanceRESTClient:
+    """
+    Pooled async HTTP client for the Binance REST API
+
+    One aiohttp session with a persistent connection pool lives on a dedicated event
+    loop thread. Async callers on any loop and sync callers on any thread share that
+    pool and the request-weight limiter through request_async() and request_sync().
+    Failed requests are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, base_url='https://api.binance.com', api_key=None, api_secret=None,
+                 max_connections=10, weight_limit=1200, max_retries=5, timeout=10,
+                 backoff_base=0.5, backoff_cap=30):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.limiter = RequestWeightLimiter(limit=weight_limit)
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def loop(self):
+        """Event loop owning the connection pool, started on first use"""
+        with self._start_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever,
+                                                name='binance-rest', daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit(self, coro):
+        """Schedule a coroutine on the client loop; returns a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro):
+        """Run a coroutine on the client loop and wait for its result (sync callers)"""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Synchronous Binance call made from the client loop thread")
+        return self.submit(coro).result()
+
+    async def run_async(self, coro):
+        """Await a coroutine on the client loop from any event loop"""
+        if asyncio.get_running_loop() is self._loop:
+            return await coro
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def request_sync(self, method, path, params=None, signed=False, weight=None):
+        return self.run(self.request(method, path, params, signed, weight))
+
+    async def request_async(self, method, path, params=None, signed=False, weight=None):
+        return await self.run_async(self.request(method, path, params, signed, weight))
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'X-MBX-APIKEY': self.api_key} if self.api_key else None
+            )
+        return self._session
+
+    def _sign(self, params):
+        if not self.api_key or not self.api_secret:
+            raise BinanceAPIError(401, "API key and secret are required for signed endpoints")
+        params = {**params, 'timestamp': int(time.time() * 1000)}
+        query = urlencode(params)
+        signature = hmac.new(self.api_secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+        return {**params, 'signature': signature}
+
+    def _backoff(self, attempt):
+        # Full jitter: spread retries of concurrent callers over the backoff window
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    async def request(self, method, path, params=None, signed=False, weight=None):
+        """
+        Send one API request (must run on the client loop)
+
+        Returns:
+        - Decoded JSON response
+
+        Raises:
+        - BinanceAPIError for error responses that retrying cannot fix or after the
+          last retry
+        """
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        weight = weight or ENDPOINT_WEIGHTS.get(path, 1)
+        session = await self._get_session()
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(weight)
+            query = urlencode(self._sign(params) if signed else params)
+            url = f"{self.base_url}{path}?{query}" if query else self.base_url + path
+            try:
+                async with session.request(method, url) as response:
+                    self.limiter.update_from_headers(response.headers)
+
+                    if response.status < 400:
+                        return await response.json(content_type=None)
+
+                    try:
+                        body = json.loads(await response.text())
+                    except ValueError:
+                        body = {}
+                    body = body if isinstance(body, dict) else {}
+                    error = BinanceAPIError(response.status, body.get('msg', response.reason), body.get('code'))
+
+                    if response.status in (418, 429):
+                        # Rate limited (418 = IP ban): honour Retry-After before anything else is sent
+                        retry_after = float(response.headers.get('Retry-After', 60))
+                        logger.warning(f"Binance rate limit hit ({response.status}), pausing {retry_after}s")
+                        self.limiter.block_for(retry_after)
+                    elif response.status < 500:
+                        raise error
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+
+            if attempt == self.max_retries:
+                raise error
+            delay = self._backoff(attempt)
+            logger.warning(f"Binance request {path} failed ({error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def _close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def close(self):
+        """Close the connection pool and stop the client loop"""
+        with self._start_lock:
+            loop = self._loop
+            self._loop = None
+        if loop is None or loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout=5)
+        except Exception as e:
+            logger.error(f"Error closing Binance client session: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        loop.close()
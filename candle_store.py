@@ -0,0 +1,220 @@
+import os
+import json
+import fcntl
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Stored kline columns and their on-disk dtypes; times are epoch milliseconds
+COLUMNS = {
+    'timestamp': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+    'close_time': np.int64,
+    'quote_asset_volume': np.float64,
+    'number_of_trades': np.int64,
+    'taker_buy_base_asset_volume': np.float64,
+    'taker_buy_quote_asset_volume': np.float64,
+    'ignore': np.int64
+}
+
+# Columns holding datetimes in get_historical_data frames
+TIME_COLUMNS = ('timestamp', 'close_time')
+
+
+def to_epoch_ms(values):
+    """Datetime-like values as int64 epoch milliseconds"""
+    return pd.DatetimeIndex(values).as_unit('ms').asi8
+
+
+class CandleStore:
+    """
+    On-disk candle store keyed by symbol and interval
+
+    Each series is a directory of raw column files (one contiguous, gap-free run of
+    candles) plus a small meta.json holding the candle count. New candles are
+    appended to the column files in place and only become visible once meta.json is
+    replaced, so readers never see a partial write. Reads memory-map the column
+    files and return zero-copy slices. Extending a series backwards rewrites it once;
+    readers take a shared lock while they open meta.json and the column files, so
+    they never pair the old meta.json with rewritten columns (or the reverse).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _series_dir(self, symbol, interval):
+        return os.path.join(self.root, symbol, interval)
+
+    def _read_meta(self, path):
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, path, meta):
+        tmp_path = os.path.join(path, f'meta.json.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, 'meta.json'))
+
+    @contextmanager
+    def _write_lock(self, path):
+        # Serialize writers across threads and processes (e.g. gunicorn workers)
+        os.makedirs(path, exist_ok=True)
+        with self._lock, open(os.path.join(path, '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _read_lock(self, path):
+        # Shared with other readers, excludes a writer that is mid-rewrite
+        try:
+            lock_file = open(os.path.join(path, '.lock'), 'a')
+        except FileNotFoundError:
+            # Nothing was ever written to this series
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def coverage(self, symbol, interval):
+        """(first, last) candle open times in epoch ms, or None if nothing is stored"""
+        meta = self._read_meta(self._series_dir(symbol, interval))
+        if not meta or meta['count'] == 0:
+            return None
+        return meta['start'], meta['start'] + (meta['count'] - 1) * meta['step']
+
+    def read(self, symbol, interval, start_ms=None, end_ms=None):
+        """
+        Stored candles opening in [start_ms, end_ms] as read-only memory-mapped arrays
+
+        Returns:
+        - Dict of column -> array (empty arrays if nothing is stored in the range)
+        """
+        path = self._series_dir(symbol, interval)
+        with self._read_lock(path):
+            return self._read_columns(path, start_ms, end_ms)
+
+    def _read_columns(self, path, start_ms=None, end_ms=None):
+        # Caller holds the read or write lock; the maps stay valid after it is released,
+        # since a rewrite replaces the column files instead of changing them
+        meta = self._read_meta(path)
+        if not meta or meta['count'] == 0:
+            return {c: np.empty(0, dtype=t) for c, t in COLUMNS.items()}
+
+        first = 0
+        last = meta['count']
+        if start_ms is not None:
+            first = min(max(-(-(start_ms - meta['start']) // meta['step']), 0), meta['count'])
+        if end_ms is not None:
+            last = min(max((end_ms - meta['start']) // meta['step'] + 1, 0), meta['count'])
+        last = max(first, last)
+
+        columns = {}
+        for column, dtype in COLUMNS.items():
+            values = np.memmap(os.path.join(path, f'{column}.bin'), dtype=dtype, mode='r',
+                               shape=(meta['count'],))
+            columns[column] = values[first:last]
+        return columns
+
+    def append(self, symbol, interval, step_ms, frame):
+        """
+        Add candles to a series
+
+        Candles directly after the stored tail are appended in place, candles directly
+        before the stored head trigger a one-off rewrite, and overlapping candles are
+        skipped. A frame that would leave a gap replaces the series.
+        """
+        if frame is None or len(frame) == 0:
+            return
+
+        columns = self._frame_columns(frame)
+        path = self._series_dir(symbol, interval)
+
+        with self._write_lock(path):
+            meta = self._read_meta(path)
+            if not meta or meta['count'] == 0:
+                self._rewrite(path, step_ms, columns)
+                return
+
+            stored_first = meta['start']
+            stored_last = stored_first + (meta['count'] - 1) * step_ms
+            timestamps = columns['timestamp']
+
+            tail = timestamps > stored_last
+            head = timestamps < stored_first
+            if tail.any():
+                new = {c: v[tail] for c, v in columns.items()}
+                if new['timestamp'][0] != stored_last + step_ms:
+                    logger.warning(f"Gap after stored {symbol} {interval} candles, replacing series")
+                    self._rewrite(path, step_ms, columns)
+                    return
+                for column, dtype in COLUMNS.items():
+                    with open(os.path.join(path, f'{column}.bin'), 'r+b') as f:
+                        # Overwrite any bytes left by an append that never reached meta.json
+                        f.seek(meta['count'] * np.dtype(dtype).itemsize)
+                        f.write(np.ascontiguousarray(new[column], dtype=dtype).tobytes())
+                        f.truncate()
+                meta['count'] += len(new['timestamp'])
+                self._write_meta(path, meta)
+
+            if head.any():
+                new = {c: v[head] for c, v in columns.items()}
+                if new['timestamp'][-1] != stored_first - step_ms:
+                    logger.warning(f"Gap before stored {symbol} {interval} candles, replacing series")
+                    self._rewrite(path, step_ms, columns)
+                    return
+                stored = self._read_columns(path)
+                self._rewrite(path, step_ms, {c: np.concatenate([new[c], stored[c]]) for c in COLUMNS})
+
+    def _rewrite(self, path, step_ms, columns):
+        # Caller holds the write lock
+        for column, dtype in COLUMNS.items():
+            tmp_path = os.path.join(path, f'{column}.bin.tmp')
+            np.ascontiguousarray(columns[column], dtype=dtype).tofile(tmp_path)
+            os.replace(tmp_path, os.path.join(path, f'{column}.bin'))
+        self._write_meta(path, {
+            'start': int(columns['timestamp'][0]),
+            'step': step_ms,
+            'count': len(columns['timestamp'])
+        })
+
+    def _frame_columns(self, frame):
+        columns = {'timestamp': to_epoch_ms(frame.index)}
+        for column in COLUMNS:
+            if column == 'timestamp':
+                continue
+            values = frame[column]
+            columns[column] = to_epoch_ms(values) if column in TIME_COLUMNS else values.to_numpy()
+        order = np.argsort(columns['timestamp'], kind='stable')
+        return {c: v[order] for c, v in columns.items()}
+
+
+def frame_from_columns(columns):
+    """Build a get_historical_data style DataFrame from stored columns"""
+    index = pd.DatetimeIndex(pd.to_datetime(columns['timestamp'], unit='ms'), name='timestamp')
+    data = {}
+    for column in COLUMNS:
+        if column == 'timestamp':
+            continue
+        values = columns[column]
+        data[column] = pd.to_datetime(values, unit='ms') if column in TIME_COLUMNS else values
+    return pd.DataFrame(data, index=index)
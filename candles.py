@@ -0,0 +1,89 @@
+import os
+import numpy as np
+import pandas as pd
+from candle_store import to_epoch_ms
+
+# Columns the backtester reads
+OHLCV = ('open', 'high', 'low', 'close', 'volume')
+
+# Float dtype for candle values (float32 halves the memory of long multi-pair runs)
+DEFAULT_DTYPE = np.dtype(os.environ.get("CANDLE_DTYPE", "float64"))
+
+
+def _read_only(values):
+    view = values.view()
+    view.flags.writeable = False
+    return view
+
+
+class CandleArrays:
+    """
+    Compact columnar candles
+
+    Holds int64 epoch-millisecond open times plus one contiguous array per requested
+    column, instead of the 12-column DataFrame from get_historical_data. Columns are
+    read with candles['close'] like a frame, but come back as read-only NumPy arrays.
+    """
+
+    def __init__(self, timestamps, columns):
+        self.timestamps = _read_only(np.ascontiguousarray(timestamps, dtype=np.int64))
+        self._columns = {}
+        for name, values in columns.items():
+            values = _read_only(np.ascontiguousarray(values))
+            if len(values) != len(self.timestamps):
+                raise ValueError(f"Column {name} has {len(values)} values for {len(self.timestamps)} candles")
+            self._columns[name] = values
+        self._index = None
+
+    @classmethod
+    def from_frame(cls, frame, columns=OHLCV, dtype=None):
+        """
+        Convert a get_historical_data DataFrame
+
+        Parameters:
+        - columns: Columns to keep (default open, high, low, close, volume)
+        - dtype: Float dtype for the values (default CANDLE_DTYPE, float64)
+        """
+        dtype = np.dtype(dtype) if dtype is not None else DEFAULT_DTYPE
+        # Copies, so the arrays never keep the frame's full block alive
+        return cls(np.array(to_epoch_ms(frame.index), dtype=np.int64),
+                   {c: frame[c].to_numpy(dtype=dtype, copy=True) for c in columns})
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def index(self):
+        """Open times as a DatetimeIndex (built on first use)"""
+        if self._index is None:
+            self._index = pd.DatetimeIndex(pd.to_datetime(self.timestamps, unit='ms'), name='timestamp')
+        return self._index
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + sum(v.nbytes for v in self._columns.values())
+
+    def complete_rows(self):
+        """Boolean mask of candles without missing values"""
+        mask = np.ones(len(self), dtype=bool)
+        for values in self._columns.values():
+            mask &= ~np.isnan(values)
+        return mask
+
+    def slice(self, start=None, stop=None):
+        """Candles start:stop as views of the same arrays"""
+        return CandleArrays(self.timestamps[start:stop],
+                            {c: v[start:stop] for c, v in self._columns.items()})
+
+    def to_frame(self):
+        return pd.DataFrame(self._columns, index=self.index)
@@ -0,0 +1,119 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ExchangeInfoSnapshot:
+    """One loaded copy of the exchange info with its symbol indexes"""
+
+    def __init__(self, info, loaded_at=None):
+        self.info = info
+        self.loaded_at = loaded_at or time.time()
+        self.by_symbol = {}
+        self.by_base = {}
+        self.by_quote = {}
+        for entry in info.get('symbols', []):
+            self.by_symbol[entry['symbol']] = entry
+            self.by_base.setdefault(entry['baseAsset'], []).append(entry)
+            self.by_quote.setdefault(entry['quoteAsset'], []).append(entry)
+
+    @property
+    def age(self):
+        return time.time() - self.loaded_at
+
+
+class ExchangeInfoCache:
+    """
+    Exchange info loaded once and indexed by symbol, base asset and quote asset
+
+    The loader (a full exchangeInfo request) runs on first use. Once the snapshot is
+    older than `ttl` seconds the next lookup starts a background reload and keeps
+    answering from the old snapshot until the new one replaces it, so lookups never
+    wait on the network after the first load. A failed load is retried after
+    `retry_delay` seconds; a failed reload keeps the old snapshot.
+    """
+
+    def __init__(self, loader, ttl=3600, retry_delay=60):
+        self.loader = loader
+        self.ttl = ttl
+        self.retry_delay = retry_delay
+        self.loads = 0
+        self.failures = 0
+        self._snapshot = None
+        self._load_lock = threading.Lock()
+        self._refreshing = False
+        self._refresh_lock = threading.Lock()
+        self._retry_at = 0.0
+
+    def snapshot(self):
+        """Current snapshot (loading it if needed), or None if it could not be loaded"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            if time.time() < self._retry_at:
+                return None
+            with self._load_lock:
+                if self._snapshot is None:
+                    self._load()
+                return self._snapshot
+        if snapshot.age > self.ttl and time.time() >= self._retry_at:
+            self._refresh_in_background()
+        return snapshot
+
+    def symbol(self, symbol):
+        """Symbol entry by name, or None if the exchange does not list it"""
+        snapshot = self.snapshot()
+        return snapshot.by_symbol.get(symbol) if snapshot else None
+
+    def symbols_for_base(self, asset):
+        snapshot = self.snapshot()
+        return list(snapshot.by_base.get(asset, [])) if snapshot else []
+
+    def symbols_for_quote(self, asset):
+        snapshot = self.snapshot()
+        return list(snapshot.by_quote.get(asset, [])) if snapshot else []
+
+    def refresh(self):
+        """Reload now (blocking)"""
+        with self._load_lock:
+            self._load()
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'loaded': snapshot is not None,
+            'symbols': len(snapshot.by_symbol) if snapshot else 0,
+            'age': snapshot.age if snapshot else None,
+            'ttl': self.ttl,
+            'loads': self.loads,
+            'failures': self.failures
+        }
+
+    def _load(self):
+        # Caller holds the load lock
+        try:
+            info = self.loader()
+            if info is None:
+                raise RuntimeError("exchange info loader returned nothing")
+            self._snapshot = ExchangeInfoSnapshot(info)
+            self.loads += 1
+        except Exception as e:
+            self.failures += 1
+            # Do not retry on every lookup while the exchange is unreachable
+            self._retry_at = time.time() + self.retry_delay
+            logger.error(f"Error loading exchange info: {e}")
+
+    def _refresh_in_background(self):
+        with self._refresh_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name='exchange-info-refresh', daemon=True).start()
@@ -0,0 +1,7 @@
+# Gunicorn picks this file up from the working directory
+
+
+def worker_exit(server, worker):
+    """Release shared connections and stop background threads of an exiting worker"""
+    import registry
+    registry.shutdown()
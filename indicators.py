@@ -0,0 +1,128 @@
+import logging
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from candles import CandleArrays
+
+logger = logging.getLogger(__name__)
+
+# Registered indicator functions by name
+INDICATORS = {}
+
+
+def indicator(name):
+    """Register an indicator function under `name`"""
+    def register(func):
+        INDICATORS[name] = func
+        return func
+    return register
+
+
+def _read_only(values):
+    view = np.asarray(values).view()
+    view.flags.writeable = False
+    return view
+
+
+@indicator('sma')
+def sma(pipeline, window, source='close'):
+    """Simple moving average"""
+    return pd.Series(pipeline.column(source)).rolling(window=window).mean().to_numpy()
+
+
+@indicator('ema')
+def ema(pipeline, window, source='close'):
+    """Exponential moving average, NaN until `window` values are available"""
+    return pd.Series(pipeline.column(source)).ewm(span=window, adjust=False, min_periods=window).mean().to_numpy()
+
+
+@indicator('rsi')
+def rsi(pipeline, window=14, source='close'):
+    """Relative Strength Index with Wilder smoothing"""
+    delta = pd.Series(pipeline.column(source)).diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    rs = gain / loss
+    return (100 - 100 / (1 + rs)).to_numpy()
+
+
+@indicator('atr')
+def atr(pipeline, window=14):
+    """Average True Range with Wilder smoothing"""
+    high = pipeline.column('high')
+    low = pipeline.column('low')
+    prev_close = pd.Series(pipeline.column('close')).shift(1).to_numpy()
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return pd.Series(true_range).ewm(alpha=1 / window, adjust=False, min_periods=window).mean().to_numpy()
+
+
+def _complete_rows(frame):
+    if isinstance(frame, CandleArrays):
+        return frame.complete_rows()
+    return frame.notna().all(axis=1).to_numpy()
+
+
+class IndicatorPipeline:
+    """
+    Memoized indicator columns over one candle frame (DataFrame or CandleArrays)
+
+    Every (indicator, params) pair is computed at most once per frame. Columns and
+    indicators are handed out as read-only arrays, so strategies share them without
+    mutating or copying the source frame.
+    """
+
+    _pipelines = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, frame, weak=False):
+        # Shared pipelines only reference their frame weakly so they never keep it alive
+        self._frame_ref = weakref.ref(frame) if weak else (lambda: frame)
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def _frame(self):
+        return self._frame_ref()
+
+    @classmethod
+    def for_frame(cls, frame):
+        """Shared pipeline for `frame`, dropped when the frame is garbage collected"""
+        key = id(frame)
+        with cls._registry_lock:
+            pipeline = cls._pipelines.get(key)
+            if pipeline is None or pipeline._frame is not frame:
+                pipeline = cls(frame, weak=True)
+                cls._pipelines[key] = pipeline
+                weakref.finalize(frame, cls._pipelines.pop, key, None)
+            return pipeline
+
+    def __len__(self):
+        return len(self._frame)
+
+    @property
+    def index(self):
+        return self._frame.index
+
+    def column(self, name):
+        """Read-only view of a source column"""
+        return self._memoize(('column', name), lambda: np.asarray(self._frame[name]))
+
+    def get(self, name, **params):
+        """Read-only indicator values, computed on first use"""
+        if name not in INDICATORS:
+            raise ValueError(f"Unknown indicator: {name}")
+        key = (name, tuple(sorted(params.items())))
+        return self._memoize(key, lambda: INDICATORS[name](self, **params))
+
+    def complete_rows(self):
+        """Boolean mask of source rows without missing values"""
+        return self._memoize(('complete_rows',), lambda: _complete_rows(self._frame))
+
+    def _memoize(self, key, compute):
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        values = _read_only(compute())
+        with self._lock:
+            return self._cache.setdefault(key, values)
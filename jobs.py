@@ -0,0 +1,276 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import registry
+from binance_api import TIMEFRAMES
+
+logger = logging.getLogger(__name__)
+
+# Parameters a client may pass to each kind of backtest job; anything else
+# (max_workers in particular) stays under server control
+JOB_PARAMS = {
+    'backtest': {'pair', 'timeframe', 'days', 'resolve_ambiguous', 'drilldown_timeframe'},
+    'batch': {'pairs', 'timeframes', 'days'},
+    'optimize': {'pair', 'timeframe', 'days', 'param_ranges', 'search', 'n_iter', 'seed', 'sort_by'},
+    'walk_forward': {'pair', 'timeframe', 'days', 'train_days', 'test_days', 'params'}
+}
+
+# Allowed range of the numeric job parameters
+JOB_LIMITS = {
+    'days': (1, 1825),
+    'train_days': (1, 365),
+    'test_days': (1, 365),
+    'n_iter': (1, 200),
+    'seed': (0, 2 ** 32 - 1)
+}
+
+# Most parameter combinations one optimize job may define (random search samples from the full grid)
+MAX_SWEEP_COMBINATIONS = 500
+
+
+def check_job_params(kind, params):
+    """
+    Check a job request against JOB_PARAMS, JOB_LIMITS and the listed pairs
+
+    Every entry point that queues a backtest (HTTP API, /backtest form, Telegram)
+    goes through this, so none of them can queue unbounded work.
+
+    Returns:
+    - The parameters with numbers, lists and symbols normalized; raises ValueError
+      on unknown keys, out-of-range values, unsupported timeframes or unknown pairs
+    """
+    if kind not in JOB_PARAMS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    unknown = set(params) - JOB_PARAMS[kind]
+    if unknown:
+        raise ValueError(f"Unknown parameters for {kind} job: {', '.join(sorted(unknown))}")
+
+    params = dict(params)
+    for name, (low, high) in JOB_LIMITS.items():
+        if name not in params:
+            continue
+        try:
+            params[name] = int(params[name])
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be an integer")
+        if not low <= params[name] <= high:
+            raise ValueError(f"{name} must be between {low} and {high}")
+
+    for name in ('pairs', 'timeframes'):
+        if isinstance(params.get(name), str):
+            params[name] = [v.strip() for v in params[name].split(',') if v.strip()]
+        if name in params and not (isinstance(params[name], list)
+                                   and all(isinstance(v, str) for v in params[name])):
+            raise ValueError(f"{name} must be a list of strings")
+    for name in ('pair', 'timeframe', 'drilldown_timeframe'):
+        if name in params and not isinstance(params[name], str):
+            raise ValueError(f"{name} must be a string")
+    if isinstance(params.get('resolve_ambiguous'), str):
+        params['resolve_ambiguous'] = params['resolve_ambiguous'].lower() in ('1', 'true', 'yes', 'on')
+
+    timeframes = [params[n] for n in ('timeframe', 'drilldown_timeframe') if n in params]
+    unsupported = [t for t in timeframes + params.get('timeframes', []) if t not in TIMEFRAMES]
+    if unsupported:
+        raise ValueError(f"Unsupported timeframes: {', '.join(unsupported)} "
+                         f"(use {', '.join(TIMEFRAMES)})")
+
+    for name in ('param_ranges', 'params'):
+        if name in params and not isinstance(params[name], dict):
+            raise ValueError(f"{name} must be an object")
+    if 'param_ranges' in params:
+        combinations = 1
+        for values in params['param_ranges'].values():
+            if not isinstance(values, list) or not values:
+                raise ValueError("param_ranges values must be non-empty lists")
+            combinations *= len(values)
+        if combinations > MAX_SWEEP_COMBINATIONS:
+            raise ValueError(f"param_ranges has {combinations} combinations (at most {MAX_SWEEP_COMBINATIONS})")
+
+    api = registry.get_binance_api()
+    if params.get('pair'):
+        symbol = api.validate_pair(params['pair'])
+        if symbol is None:
+            raise ValueError(f"Unknown trading pair: {params['pair']}")
+        params['pair'] = symbol
+    if params.get('pairs'):
+        unknown = [p for p in params['pairs'] if api.validate_pair(p) is None]
+        if unknown:
+            raise ValueError(f"Unknown trading pairs: {', '.join(unknown)}")
+        params['pairs'] = [api.validate_pair(p) for p in params['pairs']]
+    return params
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at its limit"""
+
+
+class BacktestJob:
+    """State of one submitted backtest job"""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class BacktestJobQueue:
+    """
+    Runs backtests on a bounded worker pool
+
+    submit() returns a job id immediately. At most `max_workers` jobs run at once
+    and at most `max_pending` may be queued or running, so a burst of requests is
+    rejected with JobQueueFull instead of tying up web workers or the bot loop.
+    Finished jobs are kept for `retention` seconds so their results can be polled.
+    Job state is held in this process only: each gunicorn worker has its own
+    queue, and a job can only be polled from the worker that accepted it.
+    """
+
+    # Job kinds and the WinrateTracker method that runs them
+    KINDS = {
+        'backtest': 'backtest_strategy',
+        'batch': 'backtest_many',
+        'optimize': 'optimize_strategy',
+        'walk_forward': 'walk_forward'
+    }
+
+    def __init__(self, max_workers=2, max_pending=20, retention=3600, tracker=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self._tracker = tracker
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='backtest-job')
+
+    @property
+    def tracker(self):
+        if self._tracker is not None:
+            return self._tracker
+        from registry import get_tracker
+        return get_tracker()
+
+    def submit(self, kind, params, on_done=None):
+        """
+        Queue a job and return its id
+
+        Parameters:
+        - kind: One of KINDS
+        - params: Keyword arguments for the tracker method
+        - on_done: Optional callback receiving the finished BacktestJob (runs on the worker thread)
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job = BacktestJob(kind, params)
+        with self._lock:
+            self._prune()
+            active = sum(1 for j in self._jobs.values() if not j.finished)
+            if active >= self.max_pending:
+                raise JobQueueFull(f"{active} backtest jobs already queued or running")
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, on_done)
+        logger.info(f"Queued {kind} job {job.id}")
+        return job.id
+
+    def get(self, job_id):
+        """Job state as a dict, or None if unknown or expired"""
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def wait(self, job_id, timeout=None):
+        """Block until the job finishes or timeout expires; returns the job state"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        job.done.wait(timeout)
+        return job.to_dict()
+
+    def stats(self):
+        """Job counts by status"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending,
+                'jobs': counts
+            }
+
+    def shutdown(self, wait=False):
+        """Stop accepting work; queued jobs that have not started are cancelled"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job, on_done):
+        job.status = 'running'
+        job.started_at = time.time()
+
+        def report_progress(completed, total):
+            job.progress = completed / total if total else 1.0
+
+        try:
+            params = dict(job.params)
+            if job.kind == 'batch':
+                params['progress'] = report_progress
+            job.result = getattr(self.tracker, self.KINDS[job.kind])(**params)
+            job.status = 'done'
+        except Exception as e:
+            logger.error(f"Backtest job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.progress = 1.0
+            job.finished_at = time.time()
+            job.done.set()
+
+        if on_done:
+            try:
+                on_done(job)
+            except Exception as e:
+                logger.error(f"Error in callback for job {job.id}: {e}")
+
+    def _prune(self):
+        # Caller holds the lock
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+# Shared queue used by the web app and the Telegram bot
+job_queue = BacktestJobQueue(
+    max_workers=int(os.environ.get("BACKTEST_WORKERS", 2)),
+    max_pending=int(os.environ.get("BACKTEST_MAX_PENDING", 20))
+)
+registry.on_shutdown(job_queue.shutdown)
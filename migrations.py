@@ -0,0 +1,225 @@
+import re
+import json
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, insert, select, text
+from app import db
+from models import Signal, SignalRollup, StatsGeneration
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for the PostgreSQL advisory lock that serializes concurrent upgrades
+MIGRATION_LOCK_KEY = 0x5167_6e61
+
+SCHEMA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description VARCHAR(200) NOT NULL,
+    applied_at TIMESTAMP NOT NULL
+)
+"""
+
+
+def _baseline(conn):
+    # Tables as db.create_all() made them, so existing databases adopt version 1 as-is
+    db.metadata.create_all(conn, tables=[Signal.__table__, SignalRollup.__table__,
+                                         StatsGeneration.__table__], checkfirst=True)
+
+
+def _signal_indexes(conn):
+    # Chosen from the plans of hot_queries(); `flask --app app check-plans` keeps them honest
+    for ddl in (
+        # Newest-first listings: dashboard, /signals pages, /api/signals
+        "CREATE INDEX IF NOT EXISTS ix_signals_timestamp ON signals (timestamp)",
+        # Open positions, newest first
+        "CREATE INDEX IF NOT EXISTS ix_signals_open_timestamp ON signals (timestamp) "
+        "WHERE outcome IS NULL",
+        # Closed signals in a window, newest first (win streak, exact winrate)
+        "CREATE INDEX IF NOT EXISTS ix_signals_closed_timestamp ON signals (timestamp, id) "
+        "WHERE outcome IS NOT NULL",
+        "CREATE INDEX IF NOT EXISTS ix_signals_closed_pair_timestamp ON signals (pair, timestamp, id) "
+        "WHERE outcome IS NOT NULL",
+        # Rollup windows across all pairs (per pair the (pair, day) unique index is used)
+        "CREATE INDEX IF NOT EXISTS ix_signal_rollups_day ON signal_rollups (day)"
+    ):
+        conn.execute(text(ddl))
+
+
+def _backfill_rollups(conn):
+    # Databases from before the rollups have signals but no rollup rows
+    from rollups import COUNTERS, rollup_rows
+    conn.execute(delete(SignalRollup))
+    conn.execute(insert(SignalRollup).from_select(['pair', 'day', *COUNTERS], rollup_rows()))
+
+
+def _archive_parent(conn):
+    # Closed-signal archive: monthly partitions of one table on PostgreSQL; SQLite
+    # gets a plain signals_archive_YYYYMM table per month when archive.py first needs it
+    if conn.dialect.name != 'postgresql':
+        return
+    conn.execute(text("CREATE TABLE IF NOT EXISTS signals_archive (LIKE signals) PARTITION BY RANGE (timestamp)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_signals_archive_pair_timestamp "
+                      "ON signals_archive (pair, timestamp)"))
+
+
+def _signal_ids_autoincrement(conn):
+    # SQLite reuses the highest ids once archive_signals moves those rows out, which
+    # gives an archived and a new signal the same id. Rebuild signals with
+    # AUTOINCREMENT and start its sequence above every id ever handed out.
+    if conn.dialect.name != 'sqlite':
+        return
+    ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'signals'")).scalar()
+    if 'AUTOINCREMENT' not in ddl.upper():
+        conn.execute(text("ALTER TABLE signals RENAME TO signals_rebuild"))
+        Signal.__table__.create(conn)
+        columns = ', '.join(c.name for c in Signal.__table__.columns)
+        conn.execute(text(f"INSERT INTO signals ({columns}) SELECT {columns} FROM signals_rebuild"))
+        conn.execute(text("DROP TABLE signals_rebuild"))
+        _signal_indexes(conn)
+
+    archives = conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'signals_archive_%'"
+    )).scalars().all()
+    high = max([conn.execute(text(f"SELECT max(id) FROM {name}")).scalar() or 0
+                for name in ['signals', *archives]])
+    if high:
+        conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'signals'"))
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('signals', :seq)"), {'seq': high})
+
+
+# (version, description, upgrade) in the order they are applied. Never edit or
+# renumber a released entry; append a new one. Steps are written to be safe to
+# re-run, because SQLite commits DDL outside the migration transaction.
+MIGRATIONS = [
+    (1, 'Baseline tables', _baseline),
+    (2, 'Indexes for signal listings and stats windows', _signal_indexes),
+    (3, 'Backfill signal rollups', _backfill_rollups),
+    (4, 'Partitioned archive for closed signals', _archive_parent),
+    (5, 'Never reuse signal ids', _signal_ids_autoincrement)
+]
+
+
+def migrate():
+    """
+    Apply pending migrations in order
+
+    Runs in one transaction; on PostgreSQL an advisory lock makes concurrent
+    workers wait for the first one instead of upgrading twice.
+
+    Returns:
+    - List of versions that were applied
+    """
+    applied = []
+    with db.engine.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': MIGRATION_LOCK_KEY})
+        conn.execute(text(SCHEMA_VERSION_DDL))
+        done = set(conn.execute(text("SELECT version FROM schema_version")).scalars())
+
+        for version, description, upgrade in MIGRATIONS:
+            if version in done:
+                continue
+            logger.info(f"Applying migration {version}: {description}")
+            upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) "
+                     "VALUES (:version, :description, :applied_at) ON CONFLICT (version) DO NOTHING"),
+                {'version': version, 'description': description, 'applied_at': datetime.now()}
+            )
+            applied.append(version)
+    return applied
+
+
+def schema_version():
+    """Highest applied migration version (0 for an unmigrated database)"""
+    with db.engine.connect() as conn:
+        conn.execute(text(SCHEMA_VERSION_DDL))
+        return conn.execute(text("SELECT max(version) FROM schema_version")).scalar() or 0
+
+
+def hot_queries(now=None):
+    """
+    The queries every page view, stats lookup or bot command runs, by name
+
+    They mirror the app's queries with representative parameters; check_query_plans
+    runs them through EXPLAIN.
+    """
+    now = now or datetime.now()
+    month_ago = now - timedelta(days=30)
+    closed_window = [Signal.timestamp >= month_ago, Signal.outcome.isnot(None)]
+    newest_first = [Signal.timestamp.desc(), Signal.id.desc()]
+    return {
+        'recent_signals': select(Signal).order_by(Signal.timestamp.desc()).limit(5),
+        'signals_page': select(Signal).order_by(Signal.timestamp.desc()).limit(20).offset(40),
+        'open_positions': (select(Signal).where(Signal.outcome.is_(None))
+                           .order_by(Signal.timestamp.desc()).limit(100)),
+        'win_streak': (select(Signal.outcome).where(*closed_window)
+                       .order_by(*newest_first).limit(50)),
+        'pair_win_streak': (select(Signal.outcome).where(*closed_window, Signal.pair == 'BTCUSDT')
+                            .order_by(*newest_first).limit(50)),
+        'closed_in_window': select(func.count(Signal.id)).where(*closed_window),
+        'pair_closed_in_window': select(func.count(Signal.id)).where(*closed_window, Signal.pair == 'BTCUSDT'),
+        'rollup_window': (select(SignalRollup.day, func.sum(SignalRollup.closed))
+                          .where(SignalRollup.day >= month_ago.date()).group_by(SignalRollup.day)),
+        'pair_rollup_window': (select(SignalRollup.day, func.sum(SignalRollup.closed))
+                               .where(SignalRollup.day >= month_ago.date(), SignalRollup.pair == 'BTCUSDT')
+                               .group_by(SignalRollup.day))
+    }
+
+
+def explain(conn, statement):
+    """
+    Query plan of a SELECT
+
+    Returns:
+    - List of plan lines and a list of problems (full table scans, or sorting every
+      row for an ORDER BY)
+    """
+    compiled = statement.compile(dialect=conn.dialect)
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    if conn.dialect.name == 'sqlite':
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        lines = [row[-1] for row in rows]
+        problems = [line for line in lines
+                    if re.match(r'SCAN (TABLE )?\w+$', line) or 'TEMP B-TREE FOR ORDER BY' in line]
+        return lines, problems
+
+    # PostgreSQL picks sequential scans for small tables anyway; with them
+    # discouraged, a Seq Scan in the plan means no index can serve the query
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    lines, problems = [], []
+
+    def walk(node, depth=0):
+        line = '  ' * depth + node['Node Type'] + (f" on {node['Relation Name']}" if 'Relation Name' in node else '') \
+            + (f" using {node['Index Name']}" if 'Index Name' in node else '')
+        lines.append(line)
+        if node['Node Type'] == 'Seq Scan':
+            problems.append(line.strip())
+        for child in node.get('Plans', []):
+            walk(child, depth + 1)
+
+    walk(plan[0]['Plan'])
+    return lines, problems
+
+
+def check_query_plans():
+    """
+    EXPLAIN every hot query
+
+    Returns:
+    - Dict of query name -> {'plan': [...], 'problems': [...]}; any problem means
+      the query reads the whole table
+    """
+    results = {}
+    with db.engine.connect() as conn:
+        for name, statement in hot_queries().items():
+            with conn.begin():
+                plan, problems = explain(conn, statement)
+            results[name] = {'plan': plan, 'problems': problems}
+    return results
@@ -3,6 +3,8 @@ from datetime import datetime
 
 class Signal(db.Model):
     __tablename__ = 'signals'
+    # Never reuse the ids of signals moved to the archive (SQLite otherwise hands out max(id) + 1)
+    __table_args__ = {'sqlite_autoincrement': True}
     
     id = db.Column(db.Integer, primary_key=True)
     pair = db.Column(db.String(20), nullable=False)
@@ -47,3 +49,28 @@ class Signal(db.Model):
         if not self.outcome:
             return None
         return self.outcome == 'WIN'
+
+class SignalRollup(db.Model):
+    """Per-pair, per-day signal totals, kept in step with the signals table"""
+    __tablename__ = 'signal_rollups'
+    __table_args__ = (db.UniqueConstraint('pair', 'day', name='uq_signal_rollups_pair_day'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    pair = db.Column(db.String(20), nullable=False)
+    day = db.Column(db.Date, nullable=False)  # Day the signals were logged
+    trades = db.Column(db.Integer, nullable=False, default=0)  # Signals logged, open or closed
+    closed = db.Column(db.Integer, nullable=False, default=0)  # Signals with an outcome
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    sum_duration = db.Column(db.Integer, nullable=False, default=0)  # Minutes, over closed signals
+    duration_count = db.Column(db.Integer, nullable=False, default=0)  # Closed signals with a duration
+    sum_return = db.Column(db.Float, nullable=False, default=0.0)  # Sum of profit_loss (%)
+    
+    def __repr__(self):
+        return f"<SignalRollup {self.pair} {self.day}>"
+
+class StatsGeneration(db.Model):
+    """Single-row counter bumped by every write that changes signal statistics"""
+    __tablename__ = 'stats_generation'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    generation = db.Column(db.BigInteger, nullable=False, default=0)
@@ -0,0 +1,193 @@
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class PriceTable:
+    """
+    Latest price and 24h change per symbol
+
+    Each entry is an immutable (price, change_24h, received_at) tuple that the stream
+    replaces with a single dict assignment, so readers on any thread get a consistent
+    entry without taking a lock. Only the stream's event loop writes to the table.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+
+    def update(self, symbol, price, change_24h, received_at=None):
+        self._entries[symbol] = (price, change_24h, received_at or time.time())
+
+    def get(self, symbol, max_age=None):
+        """
+        Latest price for symbol in get_current_price format
+
+        Returns:
+        - Dict with symbol, price and change_24h, or None if the symbol is unknown
+          or its last update is older than max_age seconds
+        """
+        entry = self._entries.get(symbol)
+        if entry is None:
+            self.misses += 1
+            return None
+        price, change_24h, received_at = entry
+        if max_age is not None and time.time() - received_at > max_age:
+            self.stale += 1
+            return None
+        self.hits += 1
+        return {'symbol': symbol, 'price': price, 'change_24h': change_24h}
+
+    def snapshot(self):
+        """Copy of every entry as symbol -> (price, change_24h, received_at)"""
+        return dict(self._entries)
+
+    def stats(self):
+        return {'entries': len(self._entries), 'hits': self.hits, 'stale': self.stale, 'misses': self.misses}
+
+
+class PriceStream:
+    """
+    Binance 24h ticker WebSocket feeding a PriceTable
+
+    Runs one combined-stream connection on an event loop (its own background thread
+    unless a loop is passed to start()). Symbols can be added at any time; they are
+    subscribed on the open connection and included when it reconnects. Dropped
+    connections are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, ws_url='wss://stream.binance.com:9443', symbols=None, table=None,
+                 backoff_base=1, backoff_cap=60):
+        self.ws_url = ws_url.rstrip('/')
+        self.table = table or PriceTable()
+        self.symbols = set(s.upper() for s in (symbols or []))
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.connected = False
+        self._loop = None
+        self._thread = None
+        self._task = None
+        self._runner = None
+        self._ws = None
+        self._subscribed = set()
+        self._wakeup = None
+        self._request_id = 0
+
+    def start(self, loop=None):
+        """Start streaming on `loop`, or on a dedicated background loop if none is given"""
+        if self._task is not None:
+            return
+        if loop is None:
+            loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=loop.run_forever, name='binance-stream', daemon=True)
+            self._thread.start()
+        self._loop = loop
+        self._task = asyncio.run_coroutine_threadsafe(self._run(), loop)
+
+    def subscribe(self, symbols):
+        """Add symbols to the stream (safe to call from any thread)"""
+        new = set(s.replace('/', '').upper() for s in symbols) - self.symbols
+        if not new:
+            return
+        self.symbols |= new
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._on_symbols_added)
+
+    def _on_symbols_added(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+        if self._ws is not None and not self._ws.closed:
+            asyncio.ensure_future(self._send_subscribe(self._ws))
+
+    async def _send_subscribe(self, ws):
+        pending = self.symbols - self._subscribed
+        if not pending:
+            return
+        self._subscribed |= pending
+        self._request_id += 1
+        await ws.send_json({
+            'method': 'SUBSCRIBE',
+            'params': [f"{s.lower()}@ticker" for s in sorted(pending)],
+            'id': self._request_id
+        })
+
+    def _handle(self, message):
+        # Combined streams wrap the event in {'stream': ..., 'data': ...}
+        data = message.get('data', message)
+        if data.get('e') != '24hrTicker':
+            return
+        self.table.update(data['s'], float(data['c']), float(data['P']))
+
+    async def _run(self):
+        self._runner = asyncio.current_task()
+        self._wakeup = asyncio.Event()
+        attempt = 0
+        async with aiohttp.ClientSession() as session:
+            while True:
+                if not self.symbols:
+                    await self._wakeup.wait()
+                    self._wakeup.clear()
+                    continue
+
+                streams = sorted(self.symbols)
+                url = f"{self.ws_url}/stream?streams=" + '/'.join(f"{s.lower()}@ticker" for s in streams)
+                try:
+                    async with session.ws_connect(url, heartbeat=30) as ws:
+                        self._ws = ws
+                        self._subscribed = set(streams)
+                        self.connected = True
+                        attempt = 0
+                        logger.info(f"Price stream connected ({len(streams)} symbols)")
+                        # Symbols added while connecting
+                        await self._send_subscribe(ws)
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                try:
+                                    self._handle(json.loads(msg.data))
+                                except (ValueError, KeyError) as e:
+                                    logger.warning(f"Ignoring malformed price stream message: {e}")
+                            elif msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED):
+                                break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"Price stream connection failed: {e}")
+                except Exception as e:
+                    # Anything else (a bad URL, a handler bug) must not end the stream for
+                    # good; CancelledError is not an Exception, so stop() still works
+                    logger.error(f"Price stream error: {e!r}")
+                finally:
+                    self._ws = None
+                    self.connected = False
+
+                delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+                attempt += 1
+                logger.info(f"Price stream reconnecting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _cancel(self):
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+
+    def stop(self):
+        """Close the connection and stop streaming"""
+        if self._task is None:
+            return
+        self._task = None
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel(), self._loop).result(timeout=5)
+        except Exception as e:
+            logger.error(f"Error stopping price stream: {e}")
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop.close()
+            self._thread = None
+        self._loop = None
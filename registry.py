@@ -0,0 +1,85 @@
+import os
+import atexit
+import logging
+import threading
+from binance_api import BinanceAPI
+
+logger = logging.getLogger(__name__)
+
+# Shared instances by name, created on first use
+_instances = {}
+_lock = threading.RLock()
+
+# Callbacks run by shutdown(), newest first
+_shutdown_hooks = []
+
+
+def _get(name, factory):
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = factory()
+                _instances[name] = instance
+    return instance
+
+
+def get_binance_api():
+    """Process-wide BinanceAPI (one connection pool, price stream and candle store)"""
+    return _get('binance_api', BinanceAPI)
+
+
+def get_tracker():
+    """Process-wide WinrateTracker using the shared BinanceAPI"""
+    # Imported here because tracker imports the Flask app
+    from tracker import WinrateTracker
+    return _get('tracker', lambda: WinrateTracker(binance_api=get_binance_api()))
+
+
+def on_shutdown(callback):
+    """Register a callback for shutdown(), e.g. stopping a background thread"""
+    _shutdown_hooks.append(callback)
+    return callback
+
+
+def shutdown():
+    """
+    Stop background work and release shared connections
+
+    Runs at interpreter exit and from the gunicorn worker_exit hook. Safe to call
+    more than once; instances requested afterwards are created fresh.
+    """
+    with _lock:
+        hooks = list(reversed(_shutdown_hooks))
+        _shutdown_hooks.clear()
+        instances = dict(_instances)
+        _instances.clear()
+
+    for callback in hooks:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Error in shutdown hook {callback}: {e}")
+
+    binance_api = instances.get('binance_api')
+    if binance_api is not None:
+        try:
+            binance_api.close()
+        except Exception as e:
+            logger.error(f"Error closing Binance API: {e}")
+
+    logger.info("Shared instances shut down")
+
+
+def _after_fork_in_child():
+    # Event loop threads and sockets of the parent do not survive fork; a forked
+    # worker (e.g. gunicorn with preload_app) builds its own instances on first use
+    global _lock
+    _lock = threading.RLock()
+    _instances.clear()
+
+
+atexit.register(shutdown)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,184 @@
+import time
+import logging
+import numpy as np
+import pandas as pd
+from binance_api import WEEK_ORIGIN_MS, interval_to_timedelta
+from candle_store import to_epoch_ms
+from candles import CandleArrays
+
+logger = logging.getLogger(__name__)
+
+# How each kline column combines when candles are merged into a coarser interval
+AGGREGATIONS = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+    'quote_asset_volume': 'sum',
+    'number_of_trades': 'sum',
+    'taker_buy_base_asset_volume': 'sum',
+    'taker_buy_quote_asset_volume': 'sum',
+    'ignore': 'last'
+}
+
+def interval_ms(timeframe):
+    return int(interval_to_timedelta(timeframe).total_seconds() * 1000)
+
+
+def window_end(timeframe, now_ms=None):
+    """Epoch ms at which the newest closed `timeframe` candle closed (weeks open on Monday UTC)"""
+    step = interval_ms(timeframe)
+    origin = WEEK_ORIGIN_MS if timeframe.endswith('w') else 0
+    now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+    return (now_ms - origin) // step * step + origin
+
+
+def can_resample(base_timeframe, timeframe):
+    """Whether `timeframe` candles can be built from whole `base_timeframe` candles"""
+    base_ms = interval_ms(base_timeframe)
+    target_ms = interval_ms(timeframe)
+    if target_ms < base_ms or target_ms % base_ms:
+        return False
+    # Weekly buckets start on Mondays, which only daily or finer grids hit
+    return not timeframe.endswith('w') or base_ms <= 24 * 60 * 60 * 1000
+
+
+def resample_candles(frame, base_timeframe, timeframe):
+    """
+    Aggregate candles into a coarser interval
+
+    Buckets are aligned like exchange klines (epoch origin, Mondays for weeks). A
+    leading bucket that starts before the first base candle is dropped because its
+    open, high and low would be incomplete; the last bucket may still be open, like
+    the newest exchange candle.
+
+    Parameters:
+    - frame: get_historical_data DataFrame of `base_timeframe` candles
+    - base_timeframe / timeframe: Source and target intervals (e.g. '15m', '4h')
+
+    Returns:
+    - DataFrame with the same columns, one row per `timeframe` candle
+    """
+    if not can_resample(base_timeframe, timeframe):
+        raise ValueError(f"Cannot build {timeframe} candles from {base_timeframe} candles")
+    if timeframe == base_timeframe or len(frame) == 0:
+        return frame
+
+    target_ms = interval_ms(timeframe)
+    origin_ms = WEEK_ORIGIN_MS if timeframe.endswith('w') else 0
+    ts_ms = to_epoch_ms(frame.index)
+    bucket_start = (ts_ms - origin_ms) // target_ms * target_ms + origin_ms
+
+    columns = {c: how for c, how in AGGREGATIONS.items() if c in frame.columns}
+    candles = frame[list(columns)].groupby(bucket_start, sort=True).agg(columns)
+
+    if bucket_start[0] != ts_ms[0]:
+        candles = candles.iloc[1:]
+
+    starts = candles.index.to_numpy()
+    index = pd.DatetimeIndex(pd.to_datetime(starts, unit='ms'), name='timestamp')
+    candles.index = index
+    if 'close_time' in frame.columns:
+        candles.insert(list(frame.columns).index('close_time'), 'close_time',
+                       pd.to_datetime(starts + target_ms - 1, unit='ms'))
+    return candles[[c for c in frame.columns if c in candles.columns]]
+
+
+def resample_arrays(candles, base_timeframe, timeframe):
+    """
+    resample_candles for CandleArrays, without building a DataFrame
+
+    Each column is aggregated per bucket with NumPy reductions (see AGGREGATIONS);
+    buckets and the dropped leading partial bucket are the same as resample_candles.
+
+    Returns:
+    - CandleArrays with the same columns, one row per `timeframe` candle
+    """
+    if not can_resample(base_timeframe, timeframe):
+        raise ValueError(f"Cannot build {timeframe} candles from {base_timeframe} candles")
+    if timeframe == base_timeframe or len(candles) == 0:
+        return candles
+
+    target_ms = interval_ms(timeframe)
+    origin_ms = WEEK_ORIGIN_MS if timeframe.endswith('w') else 0
+    ts_ms = candles.timestamps
+    bucket_start = (ts_ms - origin_ms) // target_ms * target_ms + origin_ms
+
+    starts = np.flatnonzero(np.r_[True, bucket_start[1:] != bucket_start[:-1]])
+    if bucket_start[0] != ts_ms[0]:
+        starts = starts[1:]
+    if len(starts) == 0:
+        return candles.slice(0, 0)
+    ends = np.r_[starts[1:], len(ts_ms)] - 1
+
+    reducers = {
+        'first': lambda values: values[starts],
+        'last': lambda values: values[ends],
+        'max': lambda values: np.fmax.reduceat(values, starts),
+        'min': lambda values: np.fmin.reduceat(values, starts),
+        'sum': lambda values: np.add.reduceat(np.nan_to_num(values), starts)
+    }
+    return CandleArrays(bucket_start[starts],
+                        {c: reducers[AGGREGATIONS[c]](candles[c]) for c in candles.columns})
+
+
+def finest_timeframe(timeframes):
+    """The shortest interval of `timeframes`"""
+    return min(timeframes, key=interval_ms)
+
+
+def load_timeframes(binance_api, pair, timeframes, days=90, cache=None):
+    """
+    Candles for several timeframes of one pair from a single fetch
+
+    The finest requested interval is fetched once as CandleArrays (the fetched
+    DataFrame is dropped straight away) and every coarser one that it divides is
+    resampled from those arrays; any other interval is fetched on its own. With a
+    cache, fetched and resampled candles are kept per (pair, source timeframe,
+    timeframe, days, window end), like backtest results: repeats within the same
+    base candle reuse them without fetching again.
+
+    Parameters:
+    - binance_api: BinanceAPI used for the fetches
+    - pair: Trading pair (e.g. 'BTCUSDT')
+    - timeframes: Candle intervals (e.g. ['15m', '1h', '4h', '1d'])
+    - days: Number of days of history
+    - cache: Optional LRUCache for the candles
+
+    Returns:
+    - Dict of timeframe -> CandleArrays of OHLCV columns (None where data could not
+      be fetched)
+    """
+    def cached(source, timeframe, compute):
+        key = (pair, source, timeframe, days, window_end(source))
+        candles = cache.get(key) if cache is not None else None
+        if candles is None:
+            candles = compute()
+            if candles is not None and cache is not None:
+                cache.put(key, candles)
+        return candles
+
+    def fetch(timeframe):
+        return cached(timeframe, timeframe, lambda: binance_api.get_candles(pair, timeframe, days))
+
+    base_timeframe = finest_timeframe(timeframes)
+    base = None
+
+    def resampled(timeframe):
+        nonlocal base
+        if base is None:
+            base = fetch(base_timeframe)
+        return resample_arrays(base, base_timeframe, timeframe) if base is not None else None
+
+    frames = {}
+    for timeframe in timeframes:
+        if timeframe == base_timeframe:
+            frames[timeframe] = fetch(timeframe)
+        elif can_resample(base_timeframe, timeframe):
+            frames[timeframe] = cached(base_timeframe, timeframe, lambda: resampled(timeframe))
+        else:
+            frames[timeframe] = fetch(timeframe)
+
+    logger.info(f"Loaded {pair} {', '.join(timeframes)} from one {base_timeframe} fetch")
+    return frames
@@ -0,0 +1,153 @@
+import logging
+from sqlalchemy import Date, and_, case, cast, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from models import Signal, SignalRollup, StatsGeneration
+from archive import signal_history
+
+logger = logging.getLogger(__name__)
+
+# Rollup columns that are sums of per-signal contributions
+COUNTERS = ('trades', 'closed', 'wins', 'sum_duration', 'duration_count', 'sum_return')
+
+
+def _insert():
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert
+    if dialect == 'sqlite':
+        return sqlite.insert
+    raise NotImplementedError(f"Signal rollups do not support {dialect}")
+
+
+def bump_generation():
+    """
+    Mark cached statistics stale in every process
+
+    Increments the stats_generation row on the current session, so the bump is
+    only seen once the write that caused it commits.
+    """
+    stmt = _insert()(StatsGeneration).values(id=1, generation=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['id'],
+        set_={'generation': StatsGeneration.generation + 1}
+    )
+    db.session.execute(stmt)
+
+
+def current_generation():
+    """The committed stats generation (0 before the first write)"""
+    return db.session.query(StatsGeneration.generation).filter_by(id=1).scalar() or 0
+
+
+def _bump(pair, day, deltas):
+    """
+    Add `deltas` to the (pair, day) rollup row, creating it if needed
+
+    Runs as one upsert statement on the current session, so it commits or rolls
+    back together with the signal change that caused it.
+    """
+    values = {c: deltas.get(c, 0) for c in COUNTERS}
+    stmt = _insert()(SignalRollup).values(pair=pair, day=day, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['pair', 'day'],
+        set_={c: getattr(SignalRollup, c) + stmt.excluded[c] for c in COUNTERS}
+    )
+    db.session.execute(stmt)
+    bump_generation()
+
+
+def outcome_counters(signal):
+    """A signal's contribution to the outcome counters (all zero while it is open)"""
+    if signal.outcome is None:
+        return {}
+    has_duration = signal.duration is not None
+    return {
+        'closed': 1,
+        'wins': 1 if signal.outcome == 'WIN' else 0,
+        'sum_duration': signal.duration if has_duration else 0,
+        'duration_count': 1 if has_duration else 0,
+        'sum_return': signal.profit_loss or 0.0
+    }
+
+
+def record_signal(signal):
+    """Count a newly logged signal (call before the commit that stores it)"""
+    _bump(signal.pair, signal.timestamp.date(), {'trades': 1})
+
+
+def record_outcome(signal, previous=None):
+    """
+    Count a signal's outcome (call before the commit that stores it)
+
+    Parameters:
+    - signal: Signal with its new outcome, closed_at and duration set
+    - previous: outcome_counters(signal) taken before the update, if the signal
+      already had an outcome that is being replaced
+    """
+    current = outcome_counters(signal)
+    previous = previous or {}
+    deltas = {c: current.get(c, 0) - previous.get(c, 0) for c in COUNTERS}
+    if any(deltas.values()):
+        _bump(signal.pair, signal.timestamp.date(), deltas)
+
+
+def rollup_rows(history=Signal):
+    """
+    SELECT of every rollup row (pair, day, *COUNTERS) computed from signals
+
+    Parameters:
+    - history: Signal, or archive.signal_history() to include archived signals
+    """
+    if db.engine.dialect.name == 'sqlite':
+        day = func.date(history.timestamp)
+    else:
+        day = cast(history.timestamp, Date)
+
+    closed = history.outcome.isnot(None)
+    has_duration = and_(closed, history.duration.isnot(None))
+    has_return = and_(closed, history.closed_at.isnot(None), history.closed_at != 0)
+    signal_return = case(
+        (history.direction == 'LONG', (history.closed_at - history.entry) / history.entry * 100),
+        else_=(history.entry - history.closed_at) / history.entry * 100
+    )
+
+    return (
+        select(
+            history.pair,
+            day,
+            func.count(history.id),
+            func.sum(case((closed, 1), else_=0)),
+            func.sum(case((history.outcome == 'WIN', 1), else_=0)),
+            func.coalesce(func.sum(case((has_duration, history.duration), else_=0)), 0),
+            func.sum(case((has_duration, 1), else_=0)),
+            func.coalesce(func.sum(case((has_return, signal_return), else_=0.0)), 0.0)
+        )
+        .group_by(history.pair, day)
+        # Rows are inserted in first-seen order, so rollup ids keep pair order
+        .order_by(func.min(history.id))
+    )
+
+
+def rebuild_rollups():
+    """
+    Recompute every rollup row from the signals, archived ones included
+    (backfill or repair)
+
+    Returns:
+    - Number of rollup rows written
+    """
+    try:
+        db.session.query(SignalRollup).delete()
+        result = db.session.execute(
+            insert(SignalRollup).from_select(['pair', 'day', *COUNTERS], rollup_rows(signal_history()))
+        )
+        bump_generation()
+        db.session.commit()
+
+        logger.info(f"Rebuilt {result.rowcount} signal rollup rows")
+        return result.rowcount
+    except Exception as e:
+        logger.error(f"Error rebuilding signal rollups: {e}")
+        db.session.rollback()
+        raise
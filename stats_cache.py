@@ -0,0 +1,80 @@
+import os
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+from rollups import current_generation
+
+logger = logging.getLogger(__name__)
+
+
+class StatsCache:
+    """
+    Signal statistics cached until the next write
+
+    Entries are keyed by the query and its arguments (window, pair, ...) and tagged
+    with the stats generation from the database and the current day. Every write
+    that changes the rollups bumps the generation in the same transaction, so an
+    entry is only served while no worker has committed a change since it was
+    computed; a lookup costs one primary-key read. Rollup windows start at
+    midnight, so entries also expire when the day changes.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key, compute):
+        """
+        Cached result for key, or compute() stored under the current generation
+
+        Returns a copy, so callers may modify it. Exceptions from compute() are
+        passed on and nothing is cached.
+        """
+        # Read before computing: a write committed meanwhile leaves the entry stale
+        tag = (current_generation(), date.today())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == tag:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(entry[1])
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (tag, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return copy.deepcopy(value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'hit_rate': self.hits / lookups if lookups > 0 else 0
+            }
+
+
+# Shared by the dashboard, the API and the Telegram bot
+stats_cache = StatsCache(max_entries=int(os.environ.get("STATS_CACHE_SIZE", 256)))
@@ -0,0 +1,76 @@
+import logging
+from abc import ABC, abstractmethod
+import numpy as np
+from backtest_engine import crossover_signals, DEFAULT_STRATEGY
+
+logger = logging.getLogger(__name__)
+
+# Registered strategy classes by name
+STRATEGIES = {}
+
+
+def register_strategy(cls):
+    """Class decorator adding a strategy to STRATEGIES"""
+    STRATEGIES[cls.name] = cls
+    return cls
+
+
+def get_strategy(name, **params):
+    """Instantiate a registered strategy by name"""
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {name}")
+    return STRATEGIES[name](**params)
+
+
+class Strategy(ABC):
+    """
+    Base class for backtest strategies
+
+    Subclasses set `name` and `defaults` and implement generate(), which reads
+    columns and indicators from an IndicatorPipeline and returns signal arrays.
+    """
+
+    name = None
+    defaults = {}
+
+    def __init__(self, **params):
+        unknown = set(params) - set(self.defaults)
+        if unknown:
+            raise ValueError(f"Unknown parameters for {self.name}: {', '.join(sorted(unknown))}")
+        self.params = {**self.defaults, **params}
+
+    def __repr__(self):
+        return f"<Strategy {self.name} {self.params}>"
+
+    @abstractmethod
+    def generate(self, pipeline):
+        """
+        Generate signals from the pipeline's frame
+
+        Returns:
+        - Dict of arrays (index, position, direction, entry, sl, tp1, tp2). `index`
+          counts only warmed-up rows, as backtest_strategy's simulation expects;
+          `position` is the row in the source frame.
+        """
+
+
+@register_strategy
+class MACrossoverStrategy(Strategy):
+    """Moving average crossover with fixed percentage SL/TP levels"""
+
+    name = 'ma_crossover'
+    defaults = {**DEFAULT_STRATEGY, 'ma_type': 'sma'}
+
+    def generate(self, pipeline):
+        params = self.params
+        ma_short = pipeline.get(params['ma_type'], window=params['short_window'])
+        ma_long = pipeline.get(params['ma_type'], window=params['long_window'])
+
+        # Skip rows with NaN values (start of moving averages)
+        rows = pipeline.complete_rows() & ~np.isnan(ma_short) & ~np.isnan(ma_long)
+        positions = np.flatnonzero(rows)
+
+        found = crossover_signals(pipeline.column('close')[rows], ma_short[rows], ma_long[rows],
+                                  params['sl_pct'], params['tp1_pct'], params['tp2_pct'])
+        found['position'] = positions[found['index']]
+        return found
@@ -1,11 +1,12 @@
 import os
+import math
 import logging
 import asyncio
 import time
 from telegram import Update
 from telegram.ext import Application, ContextTypes, CommandHandler, MessageHandler, filters
-from tracker import WinrateTracker
-import binance_api
+from jobs import job_queue, JobQueueFull, check_job_params
+from registry import get_tracker, get_binance_api
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
@@ -16,10 +17,6 @@ logger = logging.getLogger(__name__)
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "7747406899:AAGTcw4NK2oYRH27M-PHR1GIc7rpfGKe0EE")
 TELEGRAM_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "5125770095")
 
-# Create WinrateTracker instance
-tracker = WinrateTracker()
-binance = binance_api.BinanceAPI()
-
 # Command handlers
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send welcome message when the command /start is issued."""
@@ -37,13 +34,15 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/log <signal_id> <price> - Update signal outcome\n"
         "/pair <pair_name> - View performance for a specific pair\n"
         "/backtest <pair> <days> - Run backtest on a pair\n"
-        "/price <symbol> - Get current price of a crypto\n"
+        "/backtest all <days> [timeframes] - Backtest all tracked pairs\n"
+        "/job <job_id> - Check the progress of a backtest\n"
+        "/price <symbol> [symbol ...] - Get current prices (/price open for open signals)\n"
     )
     await update.message.reply_text(help_text)
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show performance statistics."""
-    global_stats = tracker.calculate_winrate(days=30)
+    global_stats = get_tracker().calculate_winrate(days=30)
     
     response = f"""
 📊 **Performance Report (Last 30 Days)** 📊
@@ -70,7 +69,10 @@ async def signal_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
         
-        pair = args[0].upper()
+        pair = get_binance_api().validate_pair(args[0])
+        if pair is None:
+            await update.message.reply_text(f"❌ Unknown trading pair: {args[0].upper()}")
+            return
         direction = args[1].upper()
         entry = float(args[2])
         tp1 = float(args[3])
@@ -93,7 +95,7 @@ async def signal_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         }
         
         # Log the signal
-        signal_id = await tracker.log_signal(signal)
+        signal_id = await get_tracker().log_signal(signal)
         
         # Calculate risk-reward ratio
         if direction == 'LONG':
@@ -134,7 +136,7 @@ async def log_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         closed_price = float(context.args[1])
         
         # Update the signal outcome
-        success = await tracker.update_outcome(signal_id, closed_price)
+        success = await get_tracker().update_outcome(signal_id, closed_price)
         
         if success:
             await update.message.reply_text(f"✅ Trade #{signal_id} updated at price {closed_price}!")
@@ -152,7 +154,7 @@ async def pair_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     pair = context.args[0].upper()
-    stats = tracker.calculate_winrate(days=30, pair=pair)
+    stats = get_tracker().calculate_winrate(days=30, pair=pair)
     
     response = f"""
 📊 **{pair} Performance (30 Days)** 📊
@@ -167,27 +169,82 @@ Use /backtest {pair} 90 to see backtest results
     await update.message.reply_text(response)
 
 async def backtest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Run a backtest on a specific pair."""
+    """Queue a backtest on a specific pair, or on all pairs with /backtest all."""
     try:
         if len(context.args) < 1:
             await update.message.reply_text("❌ Please specify a trading pair. Example: /backtest BTCUSDT 90")
             return
         
         pair = context.args[0].upper()
-        days = int(context.args[1]) if len(context.args) > 1 else 90
+        days = context.args[1] if len(context.args) > 1 else 90
         timeframe = context.args[2] if len(context.args) > 2 else '4h'
         
-        await update.message.reply_text(f"⏳ Running backtest for {pair} over {days} days on {timeframe} timeframe...")
+        if pair == 'ALL':
+            kind = 'batch'
+            params = {'timeframes': timeframe, 'days': days}
+        else:
+            kind = 'backtest'
+            params = {'pair': pair, 'timeframe': timeframe, 'days': days}
+        try:
+            params = check_job_params(kind, params)
+        except ValueError as e:
+            await update.message.reply_text(f"❌ {e}")
+            return
         
-        # Run backtest
-        result = tracker.backtest_strategy(pair, timeframe, days)
+        if kind == 'batch':
+            description = f"all pairs over {params['days']} days on {', '.join(params['timeframes'])}"
+        else:
+            description = f"{params['pair']} over {params['days']} days on {timeframe} timeframe"
         
-        if result is None or 'error' in result:
-            error = result.get('error', 'Unknown error') if result else 'Failed to get data'
-            await update.message.reply_text(f"❌ Backtest failed: {error}")
+        # The job runs on the worker pool; its result is pushed back to this chat
+        loop = asyncio.get_running_loop()
+        
+        def push_result(job):
+            asyncio.run_coroutine_threadsafe(update.message.reply_text(format_job_result(job)), loop)
+        
+        try:
+            job_id = job_queue.submit(kind, params, on_done=push_result)
+        except JobQueueFull:
+            await update.message.reply_text("❌ Too many backtests are running, please try again shortly")
             return
         
-        response = f"""
+        await update.message.reply_text(
+            f"⏳ Running backtest for {description}...\n"
+            f"Job ID: {job_id} (use /job {job_id} to check progress)"
+        )
+        
+    except Exception as e:
+        logger.error(f"Backtest error: {str(e)}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+async def job_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show the progress of a backtest job."""
+    if len(context.args) < 1:
+        await update.message.reply_text("❌ Please specify a job ID. Example: /job 1a2b3c4d5e6f")
+        return
+    
+    job = job_queue.get(context.args[0])
+    if job is None:
+        await update.message.reply_text(f"❌ Could not find job {context.args[0]}")
+        return
+    
+    await update.message.reply_text(f"🧪 Job {job['id']}: {job['status']} ({job['progress'] * 100:.0f}%)")
+
+def format_job_result(job):
+    """Format a finished backtest job as a chat message."""
+    if job.status == 'failed':
+        return f"❌ Backtest failed: {job.error}"
+    if job.kind == 'batch':
+        return format_batch_result(job.result)
+    return format_backtest_result(job.result)
+
+def format_backtest_result(result):
+    """Format a single backtest result as a chat message."""
+    if result is None or 'error' in result:
+        error = result.get('error', 'Unknown error') if result else 'Failed to get data'
+        return f"❌ Backtest failed: {error}"
+    
+    return f"""
 🧪 **Backtest Results** 🧪
 
 📊 **{result['pair']} ({result['timeframe']} - {result['period']})**
@@ -197,15 +254,29 @@ async def backtest_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 💧 **Worst Return:** {result['worst_case']:.2f}%
 🔢 **Total Signals:** {result['total_signals']}
         """
-        
-        await update.message.reply_text(response)
-        
-    except Exception as e:
-        logger.error(f"Backtest error: {str(e)}")
-        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+def format_batch_result(batch):
+    """Format a multi-pair backtest as a chat message."""
+    lines = []
+    for result in batch['results']:
+        if 'error' in result:
+            lines.append(f"❌ {result['pair']} ({result['timeframe']}): {result['error']}")
+        else:
+            lines.append(f"📊 {result['pair']} ({result['timeframe']}): {result['winrate']:.1f}% "
+                         f"over {result['total_signals']} signals")
+    
+    aggregate = batch['aggregate']
+    return "🧪 **Batch Backtest Results** 🧪\n\n" + "\n".join(lines) + f"""
+
+✅ **Overall Winrate:** {aggregate['winrate']:.1f}%
+⚖️ **Avg Risk/Reward:** {aggregate['avg_rr']:.2f}
+🔥 **Best Return:** {aggregate['best_case']:.2f}%
+💧 **Worst Return:** {aggregate['worst_case']:.2f}%
+🔢 **Total Signals:** {aggregate['total_signals']}
+    """
 
 async def price_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Get current price of a cryptocurrency."""
+    """Get current price of one or more cryptocurrencies, or of every open signal."""
     if len(context.args) < 1:
         await update.message.reply_text("❌ Please specify a symbol. Example: /price BTCUSDT")
         return
@@ -213,7 +284,22 @@ async def price_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     symbol = context.args[0].upper()
     
     try:
-        price_info = binance.get_current_price(symbol)
+        if symbol == 'OPEN':
+            await update.message.reply_text(format_open_positions(get_tracker().open_positions()))
+            return
+        
+        if len(context.args) > 1:
+            # Several symbols: one bulk price request
+            prices = get_binance_api().get_current_prices(context.args)
+            if prices is None:
+                await update.message.reply_text("❌ Could not get prices")
+                return
+            lines = [f"{s}: n/a" if math.isnan(row.price) else f"{s}: {row.price} ({row.change_24h:+.2f}%)"
+                     for s, row in prices.iterrows()]
+            await update.message.reply_text("💰 **Prices** 💰\n\n" + "\n".join(lines))
+            return
+        
+        price_info = get_binance_api().get_current_price(symbol)
         
         if price_info:
             price = price_info['price']
@@ -232,6 +318,20 @@ Current: {price}
         logger.error(f"Error getting price: {str(e)}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
+def format_open_positions(positions):
+    """Format priced open signals for a Telegram message"""
+    if not positions:
+        return "No open signals"
+    
+    lines = []
+    for p in positions:
+        if p['price'] is None:
+            lines.append(f"#{p['id']} {p['pair']} {p['direction']}: no price")
+        else:
+            lines.append(f"#{p['id']} {p['pair']} {p['direction']} @ {p['entry']}: "
+                         f"{p['price']} ({p['unrealized_pct']:+.2f}%)")
+    return "📂 **Open Signals** 📂\n\n" + "\n".join(lines)
+
 def run_telegram_bot():
     """
     Start the Telegram bot in a way that works with threading.
@@ -256,6 +356,7 @@ def run_telegram_bot():
             application.add_handler(CommandHandler("log", log_command))
             application.add_handler(CommandHandler("pair", pair_command))
             application.add_handler(CommandHandler("backtest", backtest_command))
+            application.add_handler(CommandHandler("job", job_command))
             application.add_handler(CommandHandler("price", price_command))
             
             # Run the application with our own event loop
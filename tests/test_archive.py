@@ -0,0 +1,73 @@
+import os
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+
+# The app binds its database at import time
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+
+import pytest
+from app import app, db
+from models import Signal
+from archive import archive_signals, signal_history
+from tracker import WinrateTracker
+
+
+@pytest.fixture
+def app_context():
+    with app.app_context():
+        yield
+        db.session.rollback()
+
+
+def _add_closed_signals(count):
+    now = datetime.now()
+    for k in range(count):
+        db.session.add(Signal(pair='BTCUSDT', direction='LONG', entry=100, tp1=110, sl=95,
+                              timestamp=now - timedelta(days=120 + k),
+                              outcome='WIN', closed_at=110, duration=60))
+    db.session.commit()
+
+
+def test_archived_ids_are_not_reused(app_context):
+    _add_closed_signals(5)
+    archived_ids = {row[0] for row in db.session.query(Signal.id).all()}
+
+    # Every row leaves the hot table, including the one with the highest id
+    assert archive_signals(days=0) == len(archived_ids)
+    assert db.session.query(Signal).count() == 0
+
+    tracker = WinrateTracker()
+    new_id = asyncio.run(tracker.log_signal({'pair': 'ETHUSDT', 'direction': 'SHORT',
+                                             'entry': 3000, 'tp1': 2900, 'sl': 3100}))
+    assert new_id > max(archived_ids)
+
+    db.session.expunge_all()
+    history = signal_history()
+    signals = db.session.query(history).all()
+    assert sorted(s.id for s in signals) == sorted(archived_ids | {new_id})
+    assert {s.pair for s in signals if s.id == new_id} == {'ETHUSDT'}
+
+    response = app.test_client().get('/signals?archived=1')
+    assert response.status_code == 200
+    assert b'ETHUSDT' in response.data
+
+
+def test_archive_months_refresh_after_archiving(app_context):
+    import archive
+    archive.archive_months()
+    cached = archive._months_cache
+    signal_history()
+    signal_history(datetime.now() - timedelta(days=30))
+    # Served from the per-process cache, not the catalog
+    assert archive._months_cache is cached
+
+    timestamp = datetime.now() - timedelta(days=800)
+    db.session.add(Signal(pair='BTCUSDT', direction='LONG', entry=100, tp1=110, sl=95,
+                          timestamp=timestamp, outcome='LOSS', closed_at=95, duration=30))
+    db.session.commit()
+    archive_signals(days=0)
+
+    assert datetime(timestamp.year, timestamp.month, 1) in archive.archive_months()
+    history = signal_history(timestamp)
+    assert db.session.query(history).filter(history.outcome == 'LOSS').count() == 1
@@ -3,13 +3,30 @@ from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 import logging
-from models import Signal
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from models import Signal, SignalRollup
 from app import db
-from binance_api import BinanceAPI
+from rollups import outcome_counters, record_outcome, record_signal
+from stats_cache import stats_cache
+from archive import signal_history
+from sqlalchemy import Float, Integer, case, cast, extract, func, literal
+from binance_api import BinanceAPI, interval_to_timedelta
+from backtest_engine import (simulate_trades, summarize_trades,
+                             sweep_parameters, parameter_grid, sample_parameters, walk_forward,
+                             first_exits, trade_returns, FirstTouchIndex, LONG, SHORT)
+from backtest_cache import backtest_cache, drilldown_cache, resample_cache
+from indicators import IndicatorPipeline
+from strategies import MACrossoverStrategy
+from resample import load_timeframes, window_end
+from candles import CandleArrays
 
 class WinrateTracker:
-    def __init__(self):
-        self.binance_api = BinanceAPI()
+    def __init__(self, binance_api=None):
+        self.binance_api = binance_api or BinanceAPI()
+        self.backtest_cache = backtest_cache
+        self.drilldown_cache = drilldown_cache
+        self.resample_cache = resample_cache
+        self.stats_cache = stats_cache
         self.logger = logging.getLogger(__name__)
     
     async def log_signal(self, signal):
@@ -26,6 +43,7 @@ class WinrateTracker:
             )
             
             db.session.add(new_signal)
+            record_signal(new_signal)
             db.session.commit()
             
             return new_signal.id
@@ -53,9 +71,11 @@ class WinrateTracker:
             duration_minutes = int((datetime.now() - signal.timestamp).total_seconds() / 60)
             
             # Update signal with outcome
+            previous = outcome_counters(signal)
             signal.outcome = outcome
             signal.closed_at = closed_price
             signal.duration = duration_minutes
+            record_outcome(signal, previous)
             
             db.session.commit()
             return True
@@ -64,68 +84,28 @@ class WinrateTracker:
             db.session.rollback()
             raise
     
-    def calculate_winrate(self, days=30, pair=None):
-        """Calculate winrate statistics over a given period"""
+    def calculate_winrate(self, days=30, pair=None, exact=False):
+        """
+        Calculate winrate statistics over a given period
+        
+        Counts and duration sums come from the per-day signal rollups, so the cost
+        grows with the number of days rather than signals. Two things then differ
+        from exact=True, which aggregates the signals themselves over exactly
+        `days` * 24 hours:
+        - the window starts at midnight `days` days ago, so it can hold up to a day
+          of extra signals
+        - weighted_winrate weights each calendar day by 1 / (calendar days ago + 1)
+          instead of each signal by 1 / (whole 24h periods ago + 1), so the two can
+          differ by a few points
+        `since` in the result is the window start. The win streak reads just the
+        newest outcomes until the first non-WIN. Rollup results are served from the
+        stats cache until the next signal write.
+        """
         try:
-            query = Signal.query.filter(
-                Signal.timestamp >= (datetime.now() - timedelta(days=days))
-            )
-            
-            if pair:
-                query = query.filter(Signal.pair == pair)
-            
-            # Only include signals with outcomes
-            query = query.filter(Signal.outcome.isnot(None))
-            
-            signals = query.all()
-            
-            total = len(signals)
-            if total == 0:
-                return {
-                    'winrate': 0,
-                    'total_trades': 0,
-                    'avg_duration_mins': 0,
-                    'recent_win_streak': 0,
-                    'weighted_winrate': 0
-                }
-            
-            wins = sum(1 for s in signals if s.outcome == 'WIN')
-            
-            # Calculate average duration
-            durations = [s.duration for s in signals if s.duration is not None]
-            avg_duration = sum(durations) / len(durations) if durations else 0
-            
-            # Calculate recent win streak
-            recent_signals = sorted(signals, key=lambda x: x.timestamp, reverse=True)
-            streak = 0
-            for s in recent_signals:
-                if s.outcome == 'WIN':
-                    streak += 1
-                else:
-                    break
-            
-            # Calculate weighted winrate (more weight to recent trades)
-            weighted_total = 0
-            weighted_wins = 0
-            now = datetime.now()
-            
-            for s in signals:
-                days_ago = (now - s.timestamp).days + 1  # +1 to avoid division by zero
-                weight = 1 / days_ago  # More recent = higher weight
-                
-                weighted_total += weight
-                if s.outcome == 'WIN':
-                    weighted_wins += weight
-            
-            weighted_winrate = (weighted_wins / weighted_total) * 100 if weighted_total > 0 else 0
-            
-            return {
-                'winrate': (wins / total) * 100,
-                'total_trades': total,
-                'avg_duration_mins': avg_duration,
-                'recent_win_streak': streak,
-                'weighted_winrate': weighted_winrate
-            }
+            if exact:
+                return self._winrate_stats(days, pair, exact=True)
+            return self.stats_cache.get_or_compute(('winrate', days, pair),
+                                                   lambda: self._winrate_stats(days, pair))
         
         except Exception as e:
             self.logger.error(f"Error calculating winrate: {e}")
@@ -138,51 +118,279 @@ class WinrateTracker:
                 'error': str(e)
             }
     
-    def pair_performance(self):
-        """Get performance statistics by trading pair"""
+    def _winrate_stats(self, days, pair=None, exact=False):
+        """calculate_winrate without the cache; raises on database errors"""
+        now = datetime.now()
+        start = now - timedelta(days=days)
+        if not exact:
+            start = datetime.combine(start.date(), datetime.min.time())
+        # The hot table, plus archived months only if the window reaches them
+        history = signal_history(start)
+        filters = [
+            history.timestamp >= start,
+            # Only include signals with outcomes
+            history.outcome.isnot(None)
+        ]
+        if pair:
+            filters.append(history.pair == pair)
+        
+        if exact:
+            buckets = self._signal_buckets(now, filters, history)
+        else:
+            buckets = self._rollup_buckets(now, start, pair)
+        
+        total = sum(b[1] for b in buckets)
+        if total == 0:
+            return {
+                'winrate': 0,
+                'total_trades': 0,
+                'avg_duration_mins': 0,
+                'recent_win_streak': 0,
+                'weighted_winrate': 0,
+                'since': f"{start:%Y-%m-%d %H:%M}"
+            }
+        
+        wins = sum(b[2] for b in buckets)
+        
+        # Calculate average duration
+        duration_sum = sum(b[3] or 0 for b in buckets)
+        duration_count = sum(b[4] for b in buckets)
+        avg_duration = duration_sum / duration_count if duration_count else 0
+        
+        # Calculate weighted winrate (more weight to recent trades)
+        weighted_total = 0
+        weighted_wins = 0
+        for bucket_days_ago, trades, bucket_wins, _, _ in buckets:
+            weight = 1 / (int(bucket_days_ago) + 1)  # +1 to avoid division by zero
+            weighted_total += trades * weight
+            weighted_wins += bucket_wins * weight
+        
+        weighted_winrate = (weighted_wins / weighted_total) * 100 if weighted_total > 0 else 0
+        
+        return {
+            'winrate': (wins / total) * 100,
+            'total_trades': total,
+            'avg_duration_mins': avg_duration,
+            'recent_win_streak': self._win_streak(filters, history),
+            'weighted_winrate': weighted_winrate,
+            'since': f"{start:%Y-%m-%d %H:%M}"
+        }
+    
+    def _signal_buckets(self, now, filters, history=Signal):
+        """(days_ago, closed, wins, duration sum, duration count) per day, from signals"""
+        days_ago = self._days_ago(now, history).label('days_ago')
+        return db.session.query(
+            days_ago,
+            func.count(history.id),
+            func.sum(case((history.outcome == 'WIN', 1), else_=0)),
+            func.sum(history.duration),
+            func.count(history.duration)
+        ).filter(*filters).group_by('days_ago').all()
+    
+    def _rollup_buckets(self, now, start, pair=None):
+        """(days_ago, closed, wins, duration sum, duration count) per day, from rollups"""
+        query = db.session.query(
+            SignalRollup.day,
+            func.sum(SignalRollup.closed),
+            func.sum(SignalRollup.wins),
+            func.sum(SignalRollup.sum_duration),
+            func.sum(SignalRollup.duration_count)
+        ).filter(SignalRollup.day >= start.date())
+        if pair:
+            query = query.filter(SignalRollup.pair == pair)
+        
+        today = now.date()
+        return [((today - day).days, closed, wins, duration_sum, duration_count)
+                for day, closed, wins, duration_sum, duration_count in query.group_by(SignalRollup.day).all()]
+    
+    def _days_ago(self, now, history=Signal):
+        """SQL expression for whole days between a signal's timestamp and now"""
+        now = literal(now, db.DateTime)
+        if db.engine.dialect.name == 'sqlite':
+            # julianday differences are inexact (24h can come out as 0.99999...), so
+            # round to whole seconds before dividing
+            seconds = cast(func.round((func.julianday(now) - func.julianday(history.timestamp)) * 86400), Integer)
+            return seconds // 86400
+        # PostgreSQL
+        return cast(func.floor(extract('epoch', now - history.timestamp) / 86400), Integer)
+    
+    def _win_streak(self, filters, history=Signal, page_size=50):
+        """Consecutive WINs among the newest signals, read a page at a time"""
+        query = (db.session.query(history.outcome).filter(*filters)
+                 .order_by(history.timestamp.desc(), history.id.desc()))
+        streak = 0
+        offset = 0
+        while True:
+            outcomes = [row[0] for row in query.offset(offset).limit(page_size).all()]
+            for outcome in outcomes:
+                if outcome != 'WIN':
+                    return streak
+                streak += 1
+            if len(outcomes) < page_size:
+                return streak
+            offset += page_size
+    
+    def pair_performance(self, min_trades=0, sort_by=None, limit=None, days=None, exact=False):
+        """
+        Get performance statistics by trading pair with one GROUP BY query
+        
+        Parameters:
+        - min_trades: Only pairs with at least this many signals
+        - sort_by: 'winrate', 'trades', 'wins' (highest first) or 'pair'; None keeps
+          the order in which pairs first appeared. Ties keep that order as well.
+        - limit: Most pairs to return
+        - days: Only count signals from the last `days` days (from midnight, unless exact)
+        - exact: Aggregate the signals themselves instead of the per-day rollups
+          (rollup results are served from the stats cache until the next signal write)
+        
+        Returns:
+        - Dict of pair -> {'trades', 'wins', 'winrate'} in the requested order
+        """
         try:
-            # Get all signals grouped by pair
-            pairs = {}
-            signals = Signal.query.all()
-            
-            for signal in signals:
-                pair = signal.pair
-                if pair not in pairs:
-                    pairs[pair] = {'trades': 0, 'wins': 0}
-                
-                pairs[pair]['trades'] += 1
-                
-                if signal.outcome == 'WIN':
-                    pairs[pair]['wins'] += 1
-            
-            # Calculate winrate for each pair
-            for pair in pairs:
-                if pairs[pair]['trades'] > 0:
-                    pairs[pair]['winrate'] = pairs[pair]['wins'] / pairs[pair]['trades']
-                else:
-                    pairs[pair]['winrate'] = 0
-            
-            return pairs
+            if exact:
+                return self._pair_stats(min_trades, sort_by, limit, days, exact=True)
+            return self.stats_cache.get_or_compute(
+                ('pairs', min_trades, sort_by, limit, days),
+                lambda: self._pair_stats(min_trades, sort_by, limit, days)
+            )
             
         except Exception as e:
             self.logger.error(f"Error getting pair performance: {e}")
             return {}
     
-    def backtest_strategy(self, pair, timeframe='4h', days=90):
-        """Backtest a trading strategy on historical data"""
+    def _pair_stats(self, min_trades=0, sort_by=None, limit=None, days=None, exact=False):
+        """pair_performance without the cache; raises on database errors"""
+        start = datetime.now() - timedelta(days=days) if days is not None else None
+        if exact:
+            history = signal_history(start)
+            pair_column = history.pair
+            trades = func.count(history.id)
+            wins = func.sum(case((history.outcome == 'WIN', 1), else_=0))
+            first_seen = func.min(history.id)
+        else:
+            pair_column = SignalRollup.pair
+            trades = func.sum(SignalRollup.trades)
+            wins = func.sum(SignalRollup.wins)
+            # Rollup rows are created in the order their first signal arrived
+            first_seen = func.min(SignalRollup.id)
+        winrate = cast(wins, Float) / trades
+        
+        query = db.session.query(pair_column, trades, wins).group_by(pair_column)
+        if start is not None:
+            if exact:
+                query = query.filter(history.timestamp >= start)
+            else:
+                query = query.filter(SignalRollup.day >= start.date())
+        if min_trades:
+            query = query.having(trades >= min_trades)
+        
+        order = {
+            'winrate': [winrate.desc()],
+            'trades': [trades.desc()],
+            'wins': [wins.desc()],
+            'pair': [pair_column],
+            None: []
+        }
+        if sort_by not in order:
+            raise ValueError(f"Unknown sort_by: {sort_by}")
+        query = query.order_by(*order[sort_by], first_seen)
+        if limit:
+            query = query.limit(limit)
+        
+        return {
+            pair: {'trades': pair_trades, 'wins': pair_wins,
+                   'winrate': pair_wins / pair_trades if pair_trades > 0 else 0}
+            for pair, pair_trades, pair_wins in query.all()
+        }
+    
+    def open_positions(self, limit=100):
+        """
+        Price every open signal with one bulk price request
+        
+        Parameters:
+        - limit: Most recent open signals to include
+        
+        Returns:
+        - List of dicts with the signal fields, current price and unrealized return (%)
+        """
         try:
-            # Fetch historical data from Binance
-            data = self.binance_api.get_historical_data(pair, timeframe, days)
+            signals = (Signal.query.filter(Signal.outcome.is_(None))
+                       .order_by(Signal.timestamp.desc()).limit(limit).all())
+            if not signals:
+                return []
+            
+            positions = pd.DataFrame({
+                'id': [s.id for s in signals],
+                'pair': [s.pair for s in signals],
+                'symbol': [s.pair.replace('/', '').upper() for s in signals],
+                'direction': [s.direction for s in signals],
+                'entry': [s.entry for s in signals],
+                'tp1': [s.tp1 for s in signals],
+                'sl': [s.sl for s in signals],
+                'timestamp': [s.timestamp.isoformat() for s in signals]
+            })
+            
+            prices = self.binance_api.get_current_prices(positions['symbol'].unique().tolist())
+            if prices is None:
+                raise RuntimeError("Could not get prices")
+            
+            positions['price'] = prices['price'].reindex(positions['symbol']).to_numpy()
+            side = np.where(positions['direction'] == 'LONG', 1, -1)
+            positions['unrealized_pct'] = side * (positions['price'] - positions['entry']) / positions['entry'] * 100
+            
+            # NaN (no price) becomes None for JSON
+            positions = positions.drop(columns='symbol').astype(object)
+            return positions.where(positions.notna(), None).to_dict(orient='records')
+        
+        except Exception as e:
+            self.logger.error(f"Error pricing open positions: {e}")
+            return []
+    
+    def backtest_strategy(self, pair, timeframe='4h', days=90, strategy=None,
+                          resolve_ambiguous=False, drilldown_timeframe='1m', data=None):
+        """
+        Backtest a trading strategy on historical data (MA crossover by default)
+        
+        With resolve_ambiguous, trades whose exit candle touches both SL and TP are
+        settled on `drilldown_timeframe` candles fetched for just those candles,
+        instead of always counting as a LOSS. Pass `data` to run on candles that were
+        already loaded (e.g. resampled by backtest_many).
+        """
+        strategy = strategy or MACrossoverStrategy()
+        try:
+            # The same request within the same candle window reuses the earlier result
+            cache_key = self.backtest_cache.make_key(pair, timeframe, days,
+                                                     {'strategy': strategy.name, **strategy.params,
+                                                      'resolve_ambiguous': resolve_ambiguous,
+                                                      'drilldown_timeframe': drilldown_timeframe},
+                                                     self._window_end(timeframe))
+            supplied = data is not None
+            if not supplied:
+                # Checked before fetching, so a hit costs no candle download
+                cached = self.backtest_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+                # Fetch historical data from Binance as compact OHLCV arrays
+                data = self.binance_api.get_candles(pair, timeframe, days)
+            elif not isinstance(data, CandleArrays):
+                data = CandleArrays.from_frame(data)
             
             if data is None or len(data) == 0:
                 self.logger.error(f"No historical data available for {pair}")
                 return None
             
+            fingerprint = self.backtest_cache.fingerprint(data)
+            if supplied:
+                # Candles we were handed must match the ones the cached result ran on
+                cached = self.backtest_cache.get(cache_key, fingerprint)
+                if cached is not None:
+                    return cached
+            
             # Generate signals based on historical data
-            signals = self._generate_historical_signals(data, pair)
+            signals = self._generate_historical_signals(data, pair, strategy)
             
             if not signals:
-                return {
+                result = {
                     'pair': pair,
                     'period': f'{days} days',
                     'winrate': 0,
@@ -192,31 +400,23 @@ class WinrateTracker:
                     'total_signals': 0,
                     'error': 'No signals generated'
                 }
+                self.backtest_cache.put(cache_key, result, fingerprint)
+                return result
             
-            # Simulate each trade
-            results = []
-            for signal in signals:
-                outcome = self._simulate_trade(signal, data)
-                results.append(outcome)
-            
-            # Calculate backtest statistics
-            total = len(results)
-            wins = sum(1 for r in results if r['outcome'] == 'WIN')
-            
-            winrate = (wins / total) * 100 if total > 0 else 0
-            avg_rr = sum(r['rr'] for r in results) / total if total > 0 else 0
-            returns = [r['return'] for r in results]
+            # Simulate all trades in one batch
+            results = self._simulate_trades(signals, data)
+            if resolve_ambiguous:
+                self._resolve_ambiguous(pair, timeframe, drilldown_timeframe, signals, data, results)
+            stats = summarize_trades(results)
             
-            return {
+            result = {
                 'pair': pair,
                 'period': f'{days} days',
                 'timeframe': timeframe,
-                'winrate': winrate,
-                'avg_rr': avg_rr,
-                'best_case': max(returns) if returns else 0,
-                'worst_case': min(returns) if returns else 0,
-                'total_signals': total
+                **stats
             }
+            self.backtest_cache.put(cache_key, result, fingerprint)
+            return result
             
         except Exception as e:
             self.logger.error(f"Backtest error: {e}")
@@ -226,66 +426,318 @@ class WinrateTracker:
                 'error': str(e)
             }
     
-    def _generate_historical_signals(self, data, pair):
-        """Generate trading signals from historical data"""
-        # This is a simple example - in a real system, you'd implement your trading strategy
-        # Here we'll use a simple moving average crossover
-        signals = []
+    def _window_end(self, timeframe):
+        """Epoch ms at which the newest closed `timeframe` candle closed (weeks open on Monday UTC)"""
+        return window_end(timeframe)
+    
+    def backtest_many(self, pairs=None, timeframes=None, days=90, max_workers=None, progress=None):
+        """
+        Backtest several pairs and timeframes concurrently
+        
+        Parameters:
+        - pairs: Trading pairs to test (defaults to the signal generator's pairs)
+        - timeframes: Candle intervals to test each pair on (defaults to ['4h'])
+        - days: Number of days of historical data per run
+        - max_workers: Number of pairs fetched and simulated at the same time
+        - progress: Optional callback receiving (completed runs, total runs)
+        
+        Returns:
+        - Dict with one summary per (pair, timeframe) under 'results' and the
+          signal-weighted totals under 'aggregate'
+        """
+        if pairs is None:
+            from auto_signals import signal_generator
+            pairs = signal_generator.pairs
+        timeframes = timeframes or ['4h']
+        
+        runs = [(pair, timeframe) for pair in pairs for timeframe in timeframes]
+        if not runs:
+            return {'results': [], 'aggregate': self._aggregate_backtests([])}
+        
+        # Each pair is fetched once at its finest timeframe and resampled for the others
+        with ThreadPoolExecutor(max_workers=max_workers or min(len(pairs), 8)) as pool:
+            futures = {pool.submit(self._backtest_timeframes, pair, timeframes, days): pair for pair in pairs}
+            results_by_run = {}
+            for future in as_completed(futures):
+                pair = futures[future]
+                for timeframe, result in zip(timeframes, future.result()):
+                    if result is None:
+                        result = {'pair': pair, 'period': f'{days} days', 'error': 'Failed to get data'}
+                    result.setdefault('timeframe', timeframe)
+                    results_by_run[(pair, timeframe)] = result
+                if progress:
+                    progress(len(results_by_run), len(runs))
+            results = [results_by_run[run] for run in runs]
+        
+        return {
+            'results': results,
+            'aggregate': self._aggregate_backtests(results)
+        }
+    
+    def _backtest_timeframes(self, pair, timeframes, days):
+        """Backtest one pair on several timeframes from a single candle fetch"""
+        try:
+            frames = load_timeframes(self.binance_api, pair, timeframes, days, cache=self.resample_cache)
+        except Exception as e:
+            self.logger.error(f"Error loading {pair} candles: {e}")
+            frames = {}
         
-        # Add moving averages for signal generation
-        data['ma_short'] = data['close'].rolling(window=20).mean()
-        data['ma_long'] = data['close'].rolling(window=50).mean()
+        results = []
+        for timeframe in timeframes:
+            data = frames.get(timeframe)
+            if data is None or len(data) == 0:
+                results.append(None)
+                continue
+            results.append(self.backtest_strategy(pair, timeframe, days, data=data))
+        return results
+    
+    def _aggregate_backtests(self, results):
+        """Combine per-pair backtest summaries, weighting rates by signal count"""
+        completed = [r for r in results if 'error' not in r]
+        total = sum(r['total_signals'] for r in completed)
+        
+        return {
+            'runs': len(results),
+            'failed': len(results) - len(completed),
+            'total_signals': total,
+            'winrate': sum(r['winrate'] * r['total_signals'] for r in completed) / total if total > 0 else 0,
+            'avg_rr': sum(r['avg_rr'] * r['total_signals'] for r in completed) / total if total > 0 else 0,
+            'best_case': max((r['best_case'] for r in completed), default=0),
+            'worst_case': min((r['worst_case'] for r in completed), default=0)
+        }
+    
+    def optimize_strategy(self, pair, timeframe='4h', days=90, param_ranges=None,
+                          search='grid', n_iter=20, seed=None, max_workers=None, sort_by='winrate'):
+        """
+        Sweep the crossover strategy parameters over one candle history
         
-        # Skip rows with NaN values (start of moving averages)
-        data = data.dropna()
+        Parameters:
+        - param_ranges: Dict of parameter -> candidate values, e.g.
+          {'short_window': [10, 20], 'long_window': [50, 100], 'sl_pct': [0.03, 0.05], 'tp1_pct': [0.05, 0.08]}.
+          Parameters left out keep their default value.
+        - search: 'grid' for every combination, 'random' for n_iter sampled combinations
+        - max_workers: Size of the process pool (default SWEEP_WORKERS, 2; 1 runs in-process)
+        - sort_by: Result column used for ranking ('winrate', 'avg_rr', 'total_return', ...)
         
-        for i in range(1, len(data)):
-            # Detect crossovers
-            prev_row = data.iloc[i-1]
-            curr_row = data.iloc[i]
+        Returns:
+        - Dict with the ranked result table under 'results'
+        """
+        try:
+            data = self.binance_api.get_candles(pair, timeframe, days)
             
-            # LONG signal: short MA crosses above long MA
-            if prev_row['ma_short'] <= prev_row['ma_long'] and curr_row['ma_short'] > curr_row['ma_long']:
-                entry = curr_row['close']
-                sl = entry * 0.95  # 5% stop loss
-                tp1 = entry * 1.05  # 5% take profit
-                tp2 = entry * 1.08  # 8% take profit (optional)
-                
-                signal = {
+            if data is None or len(data) == 0:
+                self.logger.error(f"No historical data available for {pair}")
+                return None
+            
+            param_ranges = param_ranges or {}
+            if search == 'random':
+                combos = sample_parameters(param_ranges, n_iter, seed)
+            else:
+                combos = parameter_grid(param_ranges)
+            
+            if not combos:
+                return {
                     'pair': pair,
-                    'direction': 'LONG',
-                    'entry': entry,
-                    'sl': sl,
-                    'tp1': tp1,
-                    'tp2': tp2,
-                    'index': i,
-                    'timestamp': curr_row.name
+                    'period': f'{days} days',
+                    'timeframe': timeframe,
+                    'combinations': 0,
+                    'results': [],
+                    'error': 'No valid parameter combinations'
                 }
-                signals.append(signal)
-            
-            # SHORT signal: short MA crosses below long MA
-            elif prev_row['ma_short'] >= prev_row['ma_long'] and curr_row['ma_short'] < curr_row['ma_long']:
-                entry = curr_row['close']
-                sl = entry * 1.05  # 5% stop loss
-                tp1 = entry * 0.95  # 5% take profit
-                tp2 = entry * 0.92  # 8% take profit (optional)
-                
-                signal = {
+            
+            results = sweep_parameters(
+                IndicatorPipeline.for_frame(data),
+                combos,
+                max_workers=max_workers,
+                sort_by=sort_by
+            )
+            
+            return {
+                'pair': pair,
+                'period': f'{days} days',
+                'timeframe': timeframe,
+                'combinations': len(combos),
+                'results': results
+            }
+        
+        except Exception as e:
+            self.logger.error(f"Parameter sweep error: {e}")
+            return {
+                'pair': pair,
+                'period': f'{days} days',
+                'error': str(e)
+            }
+    
+    def walk_forward(self, pair, timeframe='1h', days=730, train_days=90, test_days=30, params=None):
+        """
+        Walk-forward backtest over a long history
+        
+        Parameters:
+        - train_days: Length of the in-sample window before each fold
+        - test_days: Length of each out-of-sample fold
+        - params: Strategy parameter overrides (see DEFAULT_STRATEGY)
+        
+        Returns:
+        - Dict with per-fold train/test statistics under 'folds'
+        """
+        try:
+            data = self.binance_api.get_candles(pair, timeframe, days, columns=('high', 'low', 'close'))
+            
+            if data is None or len(data) == 0:
+                self.logger.error(f"No historical data available for {pair}")
+                return None
+            
+            # Convert the day-based windows into candle counts
+            timestamps = data.index
+            train_size = int(timestamps.searchsorted(timestamps[0] + timedelta(days=train_days)))
+            test_size = int(timestamps.searchsorted(timestamps[0] + timedelta(days=test_days)))
+            
+            if train_size >= len(data) or test_size == 0:
+                return {
                     'pair': pair,
-                    'direction': 'SHORT',
-                    'entry': entry,
-                    'sl': sl,
-                    'tp1': tp1,
-                    'tp2': tp2,
-                    'index': i,
-                    'timestamp': curr_row.name
+                    'period': f'{days} days',
+                    'timeframe': timeframe,
+                    'folds': [],
+                    'error': 'History too short for the requested windows'
                 }
-                signals.append(signal)
+            
+            folds = walk_forward(
+                data['close'],
+                data['high'],
+                data['low'],
+                train_size,
+                test_size,
+                params
+            )
+            
+            for fold in folds:
+                fold['train_start'] = timestamps[fold['train_start']].isoformat()
+                fold['test_start'] = timestamps[fold['test_start']].isoformat()
+                fold['test_end'] = timestamps[fold['test_end'] - 1].isoformat()
+            
+            return {
+                'pair': pair,
+                'period': f'{days} days',
+                'timeframe': timeframe,
+                'train_days': train_days,
+                'test_days': test_days,
+                'folds': folds
+            }
+        
+        except Exception as e:
+            self.logger.error(f"Walk-forward error: {e}")
+            return {
+                'pair': pair,
+                'period': f'{days} days',
+                'error': str(e)
+            }
+    
+    def _generate_historical_signals(self, data, pair, strategy=None):
+        """Generate trading signals from historical data"""
+        # Strategies read shared, memoized indicator columns and never modify the frame
+        strategy = strategy or MACrossoverStrategy()
+        found = strategy.generate(IndicatorPipeline.for_frame(data))
+        timestamps = data.index
+        
+        signals = []
+        for i, position, direction, entry, sl, tp1, tp2 in zip(found['index'], found['position'],
+                                                              found['direction'], found['entry'],
+                                                              found['sl'], found['tp1'], found['tp2']):
+            signals.append({
+                'pair': pair,
+                'direction': 'LONG' if direction == LONG else 'SHORT',
+                'entry': float(entry),
+                'sl': float(sl),
+                'tp1': float(tp1),
+                'tp2': float(tp2),
+                'index': int(i),
+                'timestamp': timestamps[position]
+            })
         
         return signals
     
+    def _simulate_trades(self, signals, data, touch_index=None):
+        """
+        Simulate all trades at once to determine their outcomes
+        
+        Returns a dict of arrays keyed like the dicts from _simulate_trade
+        (outcome, entry, exit, return, duration, rr), one element per signal.
+        """
+        if touch_index is None:
+            touch_index = FirstTouchIndex(data['high'], data['low'])
+        
+        return simulate_trades(
+            [s['index'] for s in signals],
+            [LONG if s['direction'] == 'LONG' else SHORT for s in signals],
+            [s['entry'] for s in signals],
+            [s['sl'] for s in signals],
+            [s['tp1'] for s in signals],
+            data['close'],
+            touch_index
+        )
+    
+    def _resolve_ambiguous(self, pair, timeframe, drilldown_timeframe, signals, data, results):
+        """
+        Settle trades whose exit candle touched both SL and TP on lower-timeframe candles
+        
+        Only the ambiguous candles are fetched, and each is cached. Updates `results`
+        in place; trades that stay ambiguous or lack data keep the SL-first LOSS.
+        """
+        ambiguous = np.flatnonzero(results['ambiguous'])
+        if len(ambiguous) == 0:
+            return
+        
+        candle_length = interval_to_timedelta(timeframe)
+        if interval_to_timedelta(drilldown_timeframe) >= candle_length:
+            return
+        
+        settled = 0
+        for i in ambiguous:
+            signal = signals[i]
+            candle_start = data.index[signal['index'] + results['duration'][i]]
+            lower = self._get_drilldown_candles(pair, drilldown_timeframe, candle_start, candle_length)
+            if lower is None or len(lower) == 0:
+                continue
+            
+            direction = np.array([LONG if signal['direction'] == 'LONG' else SHORT])
+            sl = np.array([signal['sl']])
+            tp1 = np.array([signal['tp1']])
+            touch_index = FirstTouchIndex(lower['high'], lower['low'])
+            sl_hit, tp_hit, exit_pos = first_exits(np.zeros(1, dtype=np.int64), direction, sl, tp1, touch_index)
+            
+            if tp_hit[0]:
+                ret, _ = trade_returns(direction, np.array([signal['entry']]), sl, tp1, tp1)
+                results['outcome'][i] = 'WIN'
+                results['exit'][i] = tp1[0]
+                results['return'][i] = ret[0]
+                results['ambiguous'][i] = False
+                settled += 1
+            elif sl_hit[0] and not touch_index.touches_both(exit_pos, direction, sl, tp1)[0]:
+                # SL was reached first, the LOSS stands
+                results['ambiguous'][i] = False
+                settled += 1
+        
+        self.logger.info(f"Settled {settled} of {len(ambiguous)} ambiguous candles for {pair} on {drilldown_timeframe}")
+    
+    def _get_drilldown_candles(self, pair, drilldown_timeframe, candle_start, candle_length):
+        """Lower-timeframe candles covering one backtest candle, cached per candle"""
+        key = (pair.replace('/', ''), drilldown_timeframe, candle_start)
+        lower = self.drilldown_cache.get(key)
+        if lower is None:
+            lower = self.binance_api.get_candles(pair, drilldown_timeframe,
+                                                 start_time=candle_start,
+                                                 end_time=candle_start + candle_length,
+                                                 columns=('high', 'low'))
+            if lower is not None:
+                self.drilldown_cache.put(key, lower)
+        return lower
+    
     def _simulate_trade(self, signal, data):
-        """Simulate a trade to determine outcome"""
+        """
+        Simulate a single trade to determine outcome
+        
+        Reference implementation of _simulate_trades, kept for equivalence checks.
+        """
         start_idx = signal['index']
         direction = signal['direction']
         entry = signal['entry']